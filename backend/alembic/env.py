@@ -4,7 +4,7 @@ from sqlalchemy import pool
 from alembic import context
 from app.core.config import settings
 from app.db.base import Base
-from app.models import user, blog  # Import all models here
+from app.models import user, blog, generation_cache, job, rate_limit  # Import all models here
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
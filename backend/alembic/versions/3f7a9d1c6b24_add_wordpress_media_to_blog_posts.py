@@ -0,0 +1,28 @@
+"""add wordpress media to blog posts
+
+Revision ID: 3f7a9d1c6b24
+Revises: 8c41f0a9d2e7
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f7a9d1c6b24'
+down_revision: Union[str, None] = '8c41f0a9d2e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('blog_posts', sa.Column('wordpress_media_id', sa.Integer(), nullable=True))
+    op.add_column('blog_posts', sa.Column('wordpress_media_source', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('blog_posts', 'wordpress_media_source')
+    op.drop_column('blog_posts', 'wordpress_media_id')
@@ -0,0 +1,82 @@
+"""add blog posts search index
+
+Revision ID: 7d2f6a3e9b51
+Revises: e4a1c9b75d30
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2f6a3e9b51'
+down_revision: Union[str, None] = 'e4a1c9b75d30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+POSTGRES_SEARCH_DDL = [
+    """
+    ALTER TABLE blog_posts ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(json_to_tsvector('english', coalesce(keywords, '[]'::json), '["string"]'), 'B') ||
+        setweight(to_tsvector('english', coalesce(summary, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(content, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX ix_blog_posts_search_vector ON blog_posts USING gin (search_vector)",
+]
+
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE blog_posts_fts USING fts5(
+        title, summary, content, keywords, content='blog_posts', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER blog_posts_fts_insert AFTER INSERT ON blog_posts BEGIN
+        INSERT INTO blog_posts_fts (rowid, title, summary, content, keywords)
+        VALUES (new.id, new.title, new.summary, new.content, new.keywords);
+    END
+    """,
+    """
+    CREATE TRIGGER blog_posts_fts_delete AFTER DELETE ON blog_posts BEGIN
+        INSERT INTO blog_posts_fts (blog_posts_fts, rowid, title, summary, content, keywords)
+        VALUES ('delete', old.id, old.title, old.summary, old.content, old.keywords);
+    END
+    """,
+    """
+    CREATE TRIGGER blog_posts_fts_update AFTER UPDATE OF title, summary, content, keywords ON blog_posts BEGIN
+        INSERT INTO blog_posts_fts (blog_posts_fts, rowid, title, summary, content, keywords)
+        VALUES ('delete', old.id, old.title, old.summary, old.content, old.keywords);
+        INSERT INTO blog_posts_fts (rowid, title, summary, content, keywords)
+        VALUES (new.id, new.title, new.summary, new.content, new.keywords);
+    END
+    """,
+]
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for statement in POSTGRES_SEARCH_DDL:
+            op.execute(statement)
+    elif dialect == 'sqlite':
+        for statement in SQLITE_SEARCH_DDL:
+            op.execute(statement)
+        # Index the posts that already exist
+        op.execute("INSERT INTO blog_posts_fts (blog_posts_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.drop_index('ix_blog_posts_search_vector', table_name='blog_posts')
+        op.drop_column('blog_posts', 'search_vector')
+    elif dialect == 'sqlite':
+        for trigger in ('blog_posts_fts_insert', 'blog_posts_fts_delete', 'blog_posts_fts_update'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS blog_posts_fts")
@@ -0,0 +1,26 @@
+"""add version to blog posts
+
+Revision ID: a9c3e5f17b82
+Revises: 7d2f6a3e9b51
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9c3e5f17b82'
+down_revision: Union[str, None] = '7d2f6a3e9b51'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('blog_posts', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('blog_posts', 'version')
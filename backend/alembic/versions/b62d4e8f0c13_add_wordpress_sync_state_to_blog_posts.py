@@ -0,0 +1,26 @@
+"""add wordpress sync state to blog posts
+
+Revision ID: b62d4e8f0c13
+Revises: 3f7a9d1c6b24
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b62d4e8f0c13'
+down_revision: Union[str, None] = '3f7a9d1c6b24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('blog_posts', sa.Column('wordpress_sync_state', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('blog_posts', 'wordpress_sync_state')
@@ -0,0 +1,45 @@
+"""compress blog post content with lz4
+
+Revision ID: c5e8b2d4f671
+Revises: a9c3e5f17b82
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e8b2d4f671'
+down_revision: Union[str, None] = 'a9c3e5f17b82'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def lz4_available() -> bool:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return False
+    enumvals = bind.execute(
+        sa.text("SELECT enumvals FROM pg_settings WHERE name = 'default_toast_compression'")
+    ).scalar()
+    return bool(enumvals) and 'lz4' in enumvals
+
+
+def upgrade() -> None:
+    # Postgres 14+ built with lz4 only; elsewhere content stays as it was
+    if not lz4_available():
+        return
+    op.execute("ALTER TABLE blog_posts ALTER COLUMN content SET COMPRESSION lz4")
+    # Stored values keep the method they were written with, so rewrite them.
+    # This touches every row; run it in a quiet window on large tables.
+    op.execute("UPDATE blog_posts SET content = content || '' WHERE content IS NOT NULL")
+
+
+def downgrade() -> None:
+    if not lz4_available():
+        return
+    # Values already compressed with lz4 stay readable
+    op.execute("ALTER TABLE blog_posts ALTER COLUMN content SET COMPRESSION DEFAULT")
@@ -0,0 +1,26 @@
+"""add blog posts listing index
+
+Revision ID: e4a1c9b75d30
+Revises: b62d4e8f0c13
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a1c9b75d30'
+down_revision: Union[str, None] = 'b62d4e8f0c13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_blog_posts_user_id_created_at_id', 'blog_posts', ['user_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_blog_posts_user_id_created_at_id', table_name='blog_posts')
@@ -1,39 +1,126 @@
-from typing import List, Any
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.auth import get_current_active_user
-from app.db.base import get_db
+from app.db.base import get_async_db
 from app.models.user import User
-from app.schemas.blog import BlogPostResponse, BlogPostCreate, BlogPostUpdate
-from app.services.blog import BlogService
+from app.schemas.blog import (
+    BlogPostResponse,
+    BlogPostCreate,
+    BlogPostUpdate,
+    BlogPostPatch,
+    BlogPostPatchResponse,
+    BlogPostPage,
+    BlogPostSearchPage,
+    BlogPostStats,
+    BulkPublishRequest,
+    BulkPublishResponse
+)
+from app.services.blog import BlogService, VersionConflict
+from app.core.responses import FastJSONResponse, rows_to_dicts
+from app.services.search import SearchService
+from app.utils.helpers import etag_matches, make_etag
 
 router = APIRouter()
 
-@router.get("/", response_model=List[BlogPostResponse])
+# Browsers may keep post responses but must revalidate them with the ETag
+CACHE_CONTROL = "private, no-cache"
+
+def cache_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag))
+
+@router.get("/", response_model=BlogPostPage)
 async def get_posts(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+) -> Any:
+    """
+    Get a page of the current user's posts, newest first
+    
+    Listings omit the post content; fetch GET /blog/{post_id} for the body.
+    The ETag changes whenever a post on the page is edited, added or removed.
+    """
+    try:
+        items, next_cursor = await BlogService.get_user_posts(db, current_user.id, limit, cursor, status)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    etag = make_etag(
+        "posts",
+        current_user.id,
+        [(item.id, item.version, item.updated_at) for item in items],
+        next_cursor
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return FastJSONResponse(
+        {"items": rows_to_dicts(items), "next_cursor": next_cursor},
+        headers=cache_headers(etag)
+    )
+
+@router.get("/search", response_model=BlogPostSearchPage)
+async def search_posts(
+    q: str = Query(..., min_length=1, max_length=200),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user),
+    limit: int = Query(20, ge=1, le=50),
+    offset: int = Query(0, ge=0, le=1000),
+) -> Any:
+    """Search the current user's posts by title, summary, keywords and content"""
+    try:
+        items, next_offset = await SearchService.search_posts(db, current_user.id, q, limit, offset)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return FastJSONResponse({"items": items, "next_offset": next_offset})
+
+@router.get("/stats", response_model=BlogPostStats)
+async def get_post_stats(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
-    """Get all posts for the current user"""
-    posts = BlogService.get_user_posts(db, current_user.id)
-    return posts
+    """Count the current user's posts by status"""
+    by_status = await BlogService.get_post_stats(db, current_user.id)
+    return {"total": sum(by_status.values()), "by_status": by_status}
 
 @router.get("/{post_id}", response_model=BlogPostResponse)
 async def get_post(
     post_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user),
+    if_none_match: Optional[str] = Header(None),
 ) -> Any:
-    """Get a specific post"""
-    post = BlogService.get_post(db, post_id, current_user.id)
-    if not post:
+    """
+    Get a specific post
+
+    Conditional requests are checked against the post's version and
+    updated_at first, so an unchanged post is answered with 304 without
+    loading its content.
+    """
+    if if_none_match:
+        revision = await BlogService.get_post_revision(db, post_id, current_user.id)
+        if not revision:
+            raise HTTPException(status_code=404, detail="Post not found")
+        etag = make_etag("post", revision.id, revision.version, revision.updated_at)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+    row = await BlogService.get_post_row(db, post_id, current_user.id)
+    if not row:
         raise HTTPException(status_code=404, detail="Post not found")
-    return post
+    post = row._asdict()
+    etag = make_etag("post", post["id"], post["version"], post.pop("updated_at"))
+    return FastJSONResponse(post, headers=cache_headers(etag))
 
 @router.post("/", response_model=BlogPostResponse)
 async def create_post(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     post_in: BlogPostCreate,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
@@ -44,7 +131,7 @@ async def create_post(
 @router.put("/{post_id}", response_model=BlogPostResponse)
 async def update_post(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     post_id: int,
     post_in: BlogPostUpdate,
     current_user: User = Depends(get_current_active_user),
@@ -53,10 +140,58 @@ async def update_post(
     post = await BlogService.update_post(db, post_id, post_in, current_user.id)
     return post
 
+@router.patch("/{post_id}", response_model=BlogPostPatchResponse)
+async def patch_post(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    post_id: int,
+    patch_in: BlogPostPatch,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Save changes to a post without resending it
+
+    Send the version the changes are based on and only the fields that
+    changed. The body can be changed with content_edits, a list of
+    {start, end, text} replacements against that version's content.
+    Returns 409 with the current version if someone saved in between.
+    """
+    try:
+        row = await BlogService.patch_post(db, post_id, patch_in, current_user.id)
+    except VersionConflict as e:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Post was modified", "version": e.current_version}
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if row is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+    return row
+
+@router.post("/publish/batch", response_model=BulkPublishResponse)
+async def publish_posts(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    publish_in: BulkPublishRequest,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """Publish several posts to WordPress at once"""
+    try:
+        results = await BlogService.publish_posts(db, publish_in.post_ids, current_user.id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    published = sum(1 for result in results if result["success"])
+    return {
+        "published": published,
+        "failed": len(results) - published,
+        "results": results
+    }
+
 @router.post("/{post_id}/publish", response_model=BlogPostResponse)
 async def publish_post(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     post_id: int,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
@@ -70,12 +205,12 @@ async def publish_post(
 @router.delete("/{post_id}")
 async def delete_post(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     post_id: int,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """Delete a post"""
-    success = BlogService.delete_post(db, post_id, current_user.id)
+    success = await BlogService.delete_post(db, post_id, current_user.id)
     if not success:
         raise HTTPException(status_code=404, detail="Post not found")
     return {"success": True}
@@ -1,20 +1,58 @@
 from fastapi import APIRouter, UploadFile, Depends, HTTPException, Form
-from sqlalchemy.orm import Session
-from typing import Dict, List, Optional
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Dict, List, Optional
+import asyncio
+import json
+import logging
 
 from app.services.file_processor import FileProcessor
-from app.db.base import get_db
+from app.services.generation_cache import get_generation_cache
+from app.services.jobs import JobService, TERMINAL_STATUSES
+from app.services.rate_limit import rate_limit
+from app.db.base import SessionLocal
 from app.core.auth import get_current_user
+from app.core.config import settings
 from app.models.user import User
+from app.schemas.job import GenerationJobResponse
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-@router.post("/upload/")
+# Every upload generates a post, so all upload routes share one bucket per user
+limit_generation = rate_limit(
+    "generate",
+    settings.RATE_LIMIT_GENERATE_PER_MINUTE,
+    settings.RATE_LIMIT_GENERATE_BURST
+)
+
+# Jobs are shared with the sync background workers, so their queries run
+# in a thread with their own session rather than on the event loop
+def create_job(
+    user_id: int,
+    filename: str,
+    data: bytes,
+    custom_prompt: Optional[str]
+) -> GenerationJobResponse:
+    with SessionLocal() as session:
+        job = JobService.enqueue(session, user_id, filename, data, custom_prompt)
+        return GenerationJobResponse.model_validate(job)
+
+def load_job(job_id: str, user_id: int) -> Optional[GenerationJobResponse]:
+    with SessionLocal() as session:
+        job = JobService.get_job(session, job_id, user_id)
+        return GenerationJobResponse.model_validate(job) if job else None
+
+def sse_event(event: str, data: str) -> str:
+    """Format a server-sent event"""
+    lines = "".join(f"data: {line}\n" for line in data.split("\n"))
+    return f"event: {event}\n{lines}\n"
+
+@router.post("/upload/", dependencies=[Depends(limit_generation)])
 async def upload_file(
     file: UploadFile,
     custom_prompt: Optional[str] = Form(None),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user)
 ) -> Dict[str, str | List[str]]:
     """
     Upload a Word or PDF file and extract its content
@@ -29,4 +67,133 @@ async def upload_file(
     except HTTPException as e:
         raise e
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/upload/stream/", dependencies=[Depends(limit_generation)])
+async def upload_file_stream(
+    file: UploadFile,
+    custom_prompt: Optional[str] = Form(None),
+    current_user: User = Depends(get_current_user)
+) -> StreamingResponse:
+    """
+    Upload a Word or PDF file and stream the generated blog post as
+    server-sent events
+    
+    Events: "status" for each stage, "content" with each piece of generated
+    HTML, then "title", "keywords" and "summary" as each is ready, and
+    "done" (or "error") at the end. Every event's data is JSON.
+    """
+    FileProcessor.validate_file_extension(file.filename)
+    source = await FileProcessor.read_upload(file)
+    filename = file.filename
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            async for event, data in FileProcessor.stream_document(filename, source, custom_prompt):
+                yield sse_event(event, json.dumps(data))
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            logger.error(f"Error streaming blog generation: {detail}")
+            error = {"detail": detail}
+            # Headers are already sent, so pass on any Retry-After in the event
+            retry_after = (getattr(e, "headers", None) or {}).get("Retry-After")
+            if retry_after:
+                error["retry_after"] = int(retry_after)
+            yield sse_event("error", json.dumps(error))
+        finally:
+            FileProcessor.discard_source(source)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post(
+    "/upload/async/",
+    response_model=GenerationJobResponse,
+    status_code=202,
+    dependencies=[Depends(limit_generation)]
+)
+async def upload_file_async(
+    file: UploadFile,
+    custom_prompt: Optional[str] = Form(None),
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    Upload a Word or PDF file and generate the blog post in the background
+    
+    Returns a job immediately; poll GET /files/jobs/{job_id} or subscribe to
+    GET /files/jobs/{job_id}/events for the result.
+    """
+    FileProcessor.validate_file_extension(file.filename)
+    data = await FileProcessor.read_upload_bytes(file)
+    return await asyncio.to_thread(create_job, current_user.id, file.filename, data, custom_prompt)
+
+@router.get("/jobs/{job_id}", response_model=GenerationJobResponse)
+async def get_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    Get the status and, once finished, the result of a generation job
+    """
+    job = await asyncio.to_thread(load_job, job_id, current_user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+) -> StreamingResponse:
+    """
+    Server-sent events for a generation job: a "status" event whenever the
+    status changes, ending once the job has succeeded or failed
+    """
+    user_id = current_user.id
+    job = await asyncio.to_thread(load_job, job_id, user_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events() -> AsyncIterator[str]:
+        last_status = None
+        while True:
+            job = await asyncio.to_thread(load_job, job_id, user_id)
+            if job is None:
+                # The job row was removed while we were watching it
+                yield sse_event("error", json.dumps({"detail": "Job not found"}))
+                return
+            if job.status != last_status:
+                last_status = job.status
+                yield sse_event("status", job.model_dump_json())
+            else:
+                # Comment line keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+            if job.status in TERMINAL_STATUSES:
+                return
+            await asyncio.sleep(settings.JOB_POLL_INTERVAL_SECONDS)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/cache/stats")
+async def get_cache_stats(
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Get hit/miss counters for the generation cache of this worker
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=400,
+            detail="The user doesn't have enough privileges"
+        )
+    cache = get_generation_cache()
+    if cache is None:
+        return {"backend": "none"}
+    return cache.stats()
@@ -1,25 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import Dict
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import FileResponse
+from typing import Any, Dict
+import asyncio
 
-from app.db.base import get_db
 from app.core.auth import get_current_user
 from app.models.user import User
 from app.services.image_generator import ImageGenerator
+from app.services.image_store import get_image_store
+from app.services.rate_limit import rate_limit
+from app.core.config import settings
 
 router = APIRouter()
 
-@router.post("/generate/")
+@router.post(
+    "/generate/",
+    dependencies=[Depends(rate_limit(
+        "images",
+        settings.RATE_LIMIT_IMAGES_PER_MINUTE,
+        settings.RATE_LIMIT_IMAGES_BURST
+    ))]
+)
 async def generate_image(
-    request: Dict[str, str],
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Dict[str, Any],
+    http_request: Request,
+    current_user: User = Depends(get_current_user)
 ) -> Dict[str, str]:
     """
     Generate an image based on the blog post content and title
     
     Args:
-        request: Dictionary containing 'content' and 'title'
+        request: Dictionary containing 'content' and 'title', and optionally
+            'regenerate' to get a new image instead of the one already
+            generated for this post
     """
     try:
         if not request.get("content") or not request.get("title"):
@@ -28,10 +40,32 @@ async def generate_image(
                 detail="Both content and title are required"
             )
             
-        image_url = await ImageGenerator.generate_image(
+        image = await ImageGenerator.generate_image(
             content=request["content"],
-            title=request["title"]
+            title=request["title"],
+            regenerate=bool(request.get("regenerate", False))
         )
+        image_url = str(http_request.url_for("get_image_file", name=image.name))
         return {"imageUrl": image_url}
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/files/{name}")
+async def get_image_file(name: str) -> FileResponse:
+    """
+    Serve an image from the local image store
+    
+    Names are content hashes, so responses never change and can be cached
+    indefinitely. No auth is required so the URL works in <img> tags.
+    """
+    # get() touches the file's mtime to mark it recently used
+    image = await asyncio.to_thread(get_image_store().get, name)
+    if image is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return FileResponse(
+        image.path,
+        media_type=image.content_type,
+        headers={"Cache-Control": "public, max-age=31536000, immutable"}
+    ) 
\ No newline at end of file
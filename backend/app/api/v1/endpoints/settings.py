@@ -1,12 +1,12 @@
 from typing import Any
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import httpx
 from urllib.parse import urljoin
 import logging
 
-from app.core.auth import get_current_active_user
-from app.db.base import get_db
+from app.core.auth import get_current_active_user, invalidate_user_cache
+from app.db.base import get_async_db
 from app.models.user import User
 from app.schemas.settings import WordPressSettings, WordPressSettingsUpdate
 
@@ -32,9 +32,9 @@ def get_wordpress_settings(
     }
 
 @router.put("/wordpress", response_model=WordPressSettings)
-def update_wordpress_settings(
+async def update_wordpress_settings(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     settings_in: WordPressSettingsUpdate,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
@@ -50,8 +50,9 @@ def update_wordpress_settings(
         current_user.wordpress_password = settings_in.applicationPassword
         
         db.add(current_user)
-        db.commit()
-        db.refresh(current_user)
+        await db.commit()
+        invalidate_user_cache(current_user.id)
+        await db.refresh(current_user)
         
         logger.info(f"Successfully updated settings for user {current_user.email}")
         return {
@@ -81,6 +82,8 @@ async def test_wordpress_connection(
         # Create basic auth header
         auth = (settings_in.username, settings_in.applicationPassword)
         
+        # A one-off client: the URL is unsaved user input, so it must not
+        # claim a slot among the pooled clients of configured sites
         async with httpx.AsyncClient() as client:
             # Try to access the WordPress REST API
             response = await client.get(
@@ -1,14 +1,19 @@
 from typing import Any, List
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.auth import get_current_active_user, get_password_hash
-from app.db.base import get_db
+from app.core.auth import get_current_active_user, hash_password, invalidate_user_cache
+from app.core.responses import FastJSONResponse, rows_to_dicts
+from app.db.base import get_async_db
 from app.models.user import User
 from app.schemas.user import UserResponse, UserUpdate
 
 router = APIRouter()
 
+# Columns returned as UserResponse
+USER_COLUMNS = (User.id, User.email, User.full_name, User.is_active, User.is_superuser)
+
 @router.get("/me", response_model=UserResponse)
 def read_user_me(
     current_user: User = Depends(get_current_active_user),
@@ -19,8 +24,8 @@ def read_user_me(
     return current_user
 
 @router.get("/", response_model=List[UserResponse])
-def read_users(
-    db: Session = Depends(get_db),
+async def read_users(
+    db: AsyncSession = Depends(get_async_db),
     skip: int = 0,
     limit: int = 100,
     current_user: User = Depends(get_current_active_user),
@@ -33,19 +38,19 @@ def read_users(
             status_code=400,
             detail="The user doesn't have enough privileges"
         )
-    users = db.query(User).offset(skip).limit(limit).all()
-    return users
+    result = await db.execute(select(*USER_COLUMNS).order_by(User.id).offset(skip).limit(limit))
+    return FastJSONResponse(rows_to_dicts(result.all()))
 
 @router.get("/{user_id}", response_model=UserResponse)
-def read_user_by_id(
+async def read_user_by_id(
     user_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> Any:
     """
     Get a specific user by id.
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = (await db.execute(select(*USER_COLUMNS).where(User.id == user_id))).first()
     if not user:
         raise HTTPException(
             status_code=404,
@@ -56,12 +61,12 @@ def read_user_by_id(
             status_code=400,
             detail="The user doesn't have enough privileges"
         )
-    return user
+    return FastJSONResponse(user._asdict())
 
 @router.put("/me", response_model=UserResponse)
-def update_user_me(
+async def update_user_me(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_in: UserUpdate,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
@@ -69,12 +74,13 @@ def update_user_me(
     Update own user.
     """
     if user_in.password is not None:
-        current_user.hashed_password = get_password_hash(user_in.password)
+        current_user.hashed_password = await hash_password(user_in.password)
     if user_in.full_name is not None:
         current_user.full_name = user_in.full_name
     if user_in.email is not None:
         current_user.email = user_in.email
     db.add(current_user)
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    invalidate_user_cache(current_user.id)
+    await db.refresh(current_user)
     return current_user
@@ -24,6 +24,10 @@ class Settings(BaseSettings):
             return v
         raise ValueError(v)
 
+    # Response compression (gzip for responses of at least this many bytes)
+    GZIP_MINIMUM_SIZE: int = 1024
+    GZIP_COMPRESS_LEVEL: int = 6
+
     # Database
     POSTGRES_SERVER: str
     POSTGRES_USER: str
@@ -37,18 +41,102 @@ class Settings(BaseSettings):
             return v
         return f"postgresql://{values.get('POSTGRES_USER')}:{values.get('POSTGRES_PASSWORD')}@{values.get('POSTGRES_SERVER')}/{values.get('POSTGRES_DB')}"
 
+    # Async driver URL for request handlers; derived from SQLALCHEMY_DATABASE_URI when unset
+    ASYNC_SQLALCHEMY_DATABASE_URI: str | None = None
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    # Recycle connections before server or proxy idle timeouts drop them
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+
     # JWT
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Decoded tokens and users are cached per process for this long
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_MAX_ENTRIES: int = 10_000
+    # Password hashing (stored hashes are upgraded to BCRYPT_ROUNDS on login)
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
 
     # OpenAI
     OPENAI_API_KEY: str
+    OPENAI_MAX_CONNECTIONS: int = 20
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    OPENAI_TIMEOUT_SECONDS: float = 120.0
+    OPENAI_MAX_RETRIES: int = 2
+    # Caps on in-flight OpenAI calls per worker; further calls queue for a free slot
+    OPENAI_MAX_CONCURRENT_CHAT: int = 16
+    OPENAI_MAX_CONCURRENT_IMAGES: int = 4
+    OPENAI_QUEUE_TIMEOUT_SECONDS: float = 30.0
+    AI_STRUCTURED_OUTPUT: bool = True
+    AI_METADATA_TIMEOUT_SECONDS: float = 30.0
+    # Judgments longer than the threshold are summarized chunk by chunk first
+    AI_CHUNK_THRESHOLD_CHARS: int = 60_000
+    AI_CHUNK_SIZE_CHARS: int = 12_000
+    AI_CHUNK_OVERLAP_CHARS: int = 800
+    AI_CHUNK_CONCURRENCY: int = 4
+    AI_CHUNK_SUMMARY_MAX_TOKENS: int = 800
+    AI_CHUNK_MAX_ROUNDS: int = 2
+
+    # Uploads (larger files are spooled to disk instead of memory)
+    UPLOAD_MAX_BYTES: int = 25 * 1024 * 1024
+    UPLOAD_SPOOL_MAX_BYTES: int = 5 * 1024 * 1024
+    UPLOAD_CHUNK_BYTES: int = 1024 * 1024
+
+    # Document text extraction (0 MB disables the worker memory cap)
+    EXTRACTION_WORKERS: int = 2
+    EXTRACTION_TIMEOUT_SECONDS: float = 60.0
+    EXTRACTION_MAX_MEMORY_MB: int = 1024
+    # Stop reading a document once this much text has been extracted
+    EXTRACTION_MAX_CHARS: int | None = 400_000
+    EXTRACTION_MAX_TOKENS: int | None = None
+
+    # Background generation jobs (0 workers disables job processing in this process)
+    JOB_WORKERS: int = 2
+    JOB_POLL_INTERVAL_SECONDS: float = 2.0
+    JOB_LEASE_SECONDS: int = 15 * 60
+    JOB_MAX_ATTEMPTS: int = 3
+
+    # Generation cache ("memory", "database" or "none")
+    GENERATION_CACHE_BACKEND: str = "memory"
+    GENERATION_CACHE_TTL_SECONDS: int = 7 * 24 * 60 * 60
+    GENERATION_CACHE_MAX_ENTRIES: int = 1000
+
+    # Per-user rate limits on OpenAI-backed endpoints ("memory", "none", or
+    # "database" to share buckets between workers through Postgres)
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_MAX_KEYS: int = 10_000
+    RATE_LIMIT_GENERATE_PER_MINUTE: float = 6.0
+    RATE_LIMIT_GENERATE_BURST: int = 3
+    RATE_LIMIT_IMAGES_PER_MINUTE: float = 4.0
+    RATE_LIMIT_IMAGES_BURST: int = 2
+
+    # Generated image store (resizing and WebP transcoding need Pillow)
+    IMAGE_STORE_DIR: str = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "media", "images")
+    IMAGE_STORE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+    IMAGE_STORE_MAX_DIMENSION: int | None = None
+    IMAGE_STORE_WEBP: bool = False
+    IMAGE_STORE_WEBP_QUALITY: int = 85
 
     # WordPress
     WORDPRESS_URL: str | None = None
     WORDPRESS_USERNAME: str | None = None
     WORDPRESS_PASSWORD: str | None = None
+    WORDPRESS_MAX_CONNECTIONS: int = 10
+    WORDPRESS_MAX_KEEPALIVE_CONNECTIONS: int = 5
+    WORDPRESS_KEEPALIVE_EXPIRY_SECONDS: float = 60.0
+    # Sites that keep a pooled client; the least recently used beyond this are closed
+    WORDPRESS_MAX_CLIENTS: int = 100
+    WORDPRESS_PUBLISH_CONCURRENCY: int = 4
+    WORDPRESS_MAX_RETRIES: int = 3
+    WORDPRESS_RETRY_BACKOFF_SECONDS: float = 1.0
+    WORDPRESS_RETRY_MAX_DELAY_SECONDS: float = 30.0
+    # Downloads of featured images hosted elsewhere, shared across all hosts
+    IMAGE_DOWNLOAD_MAX_CONNECTIONS: int = 10
+    IMAGE_DOWNLOAD_MAX_KEEPALIVE_CONNECTIONS: int = 5
 
     class Config:
         case_sensitive = True
@@ -1,4 +1,4 @@
 from app.db.base_class import Base
-from app.db.base import engine, get_db, SessionLocal
+from app.db.base import engine, get_db, SessionLocal, async_engine, get_async_db, AsyncSessionLocal
 
-__all__ = ["Base", "engine", "get_db", "SessionLocal"]
+__all__ = ["Base", "engine", "get_db", "SessionLocal", "async_engine", "get_async_db", "AsyncSessionLocal"]
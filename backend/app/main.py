@@ -1,13 +1,34 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from app.core.auth import password_hasher
 from app.core.config import settings
+from app.db.base import async_engine
 from app.api.v1.api import api_router
+from app.services.jobs import start_job_workers, stop_job_workers
+from app.services.openai_client import close_openai_client
+from app.services.text_extraction import shutdown_extraction_pool
+from app.services.wordpress import wordpress_clients
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_job_workers()
+    yield
+    await stop_job_workers()
+    # Release pooled connections held by shared clients
+    await close_openai_client()
+    await wordpress_clients.aclose()
+    shutdown_extraction_pool()
+    password_hasher.shutdown()
+    await async_engine.dispose()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
     description=settings.DESCRIPTION,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
 # Set up CORS middleware
@@ -19,6 +40,25 @@ app.add_middleware(
     allow_headers=["*", "Authorization"],  # Explicitly allow Authorization header
 )
 
+# Compress JSON bodies (post HTML compresses well). Event streams must never
+# be buffered, and images and archives are already compressed.
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=settings.GZIP_MINIMUM_SIZE,
+    compresslevel=settings.GZIP_COMPRESS_LEVEL,
+    exclude_content_types=(
+        "text/event-stream",
+        "image/*",
+        "audio/*",
+        "video/*",
+        "font/woff",
+        "font/woff2",
+        "application/gzip",
+        "application/x-gzip",
+        "application/zip",
+    ),
+)
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
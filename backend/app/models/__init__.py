@@ -1,8 +1,11 @@
 from sqlalchemy.orm import relationship
 from app.models.user import User
 from app.models.blog import BlogPost
+from app.models.generation_cache import GenerationCacheEntry
+from app.models.job import GenerationJob
+from app.models.rate_limit import RateLimitBucket
 
 # Add back_populates relationships
 User.blog_posts = relationship("BlogPost", back_populates="user")
 
-__all__ = ["User", "BlogPost"]
+__all__ = ["User", "BlogPost", "GenerationCacheEntry", "GenerationJob", "RateLimitBucket"]
@@ -1,21 +1,104 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON, Index, DDL, event, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.base import Base
 
 class BlogPost(Base):
     __tablename__ = "blog_posts"
+    __table_args__ = (
+        # Serves the keyset-paginated listing of a user's posts
+        Index("ix_blog_posts_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
+    # HTML body; compressed by Postgres (see CONTENT_COMPRESSION_DDL below)
     content = Column(String)
     summary = Column(String, nullable=True)
     keywords = Column(JSON, nullable=True)
     image_url = Column(String, nullable=True)
     status = Column(String, default="draft")
+    # Bumped on every edit; clients send it back for optimistic concurrency
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     wordpress_post_id = Column(Integer, nullable=True)
+    # Featured image already in the WordPress media library, and the image URL it came from
+    wordpress_media_id = Column(Integer, nullable=True)
+    wordpress_media_source = Column(String, nullable=True)
+    # Hashes of the fields last sent to WordPress, or the start of an unfinished create
+    wordpress_sync_state = Column(JSON, nullable=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     user = relationship("app.models.user.User", back_populates="blog_posts")
+
+# Full-text search index. Postgres keeps a weighted tsvector in a generated
+# column with a GIN index; SQLite (local development) uses an FTS5 table kept
+# in sync by triggers. The column is not mapped, so it is never loaded.
+POSTGRES_SEARCH_DDL = [
+    """
+    ALTER TABLE blog_posts ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(json_to_tsvector('english', coalesce(keywords, '[]'::json), '["string"]'), 'B') ||
+        setweight(to_tsvector('english', coalesce(summary, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(content, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX ix_blog_posts_search_vector ON blog_posts USING gin (search_vector)",
+]
+
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE blog_posts_fts USING fts5(
+        title, summary, content, keywords, content='blog_posts', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER blog_posts_fts_insert AFTER INSERT ON blog_posts BEGIN
+        INSERT INTO blog_posts_fts (rowid, title, summary, content, keywords)
+        VALUES (new.id, new.title, new.summary, new.content, new.keywords);
+    END
+    """,
+    """
+    CREATE TRIGGER blog_posts_fts_delete AFTER DELETE ON blog_posts BEGIN
+        INSERT INTO blog_posts_fts (blog_posts_fts, rowid, title, summary, content, keywords)
+        VALUES ('delete', old.id, old.title, old.summary, old.content, old.keywords);
+    END
+    """,
+    """
+    CREATE TRIGGER blog_posts_fts_update AFTER UPDATE OF title, summary, content, keywords ON blog_posts BEGIN
+        INSERT INTO blog_posts_fts (blog_posts_fts, rowid, title, summary, content, keywords)
+        VALUES ('delete', old.id, old.title, old.summary, old.content, old.keywords);
+        INSERT INTO blog_posts_fts (rowid, title, summary, content, keywords)
+        VALUES (new.id, new.title, new.summary, new.content, new.keywords);
+    END
+    """,
+]
+
+for statement in POSTGRES_SEARCH_DDL:
+    event.listen(BlogPost.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+for statement in SQLITE_SEARCH_DDL:
+    event.listen(BlogPost.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(BlogPost.__table__, "before_drop", DDL("DROP TABLE IF EXISTS blog_posts_fts").execute_if(dialect="sqlite"))
+
+# Post bodies are long, repetitive HTML. Postgres compresses them in TOAST
+# already (pglz); lz4 decompresses several times faster for a similar size.
+# Compression happens inside the database so that the search index and
+# PATCH content edits keep working on plain text, and listings never touch
+# the column at all. Needs Postgres 14+ built with lz4.
+CONTENT_COMPRESSION_DDL = "ALTER TABLE blog_posts ALTER COLUMN content SET COMPRESSION lz4"
+
+def lz4_available(ddl, target, bind, **kw) -> bool:
+    """Whether the Postgres server can compress columns with lz4"""
+    if bind is None:
+        return False
+    enumvals = bind.execute(
+        text("SELECT enumvals FROM pg_settings WHERE name = 'default_toast_compression'")
+    ).scalar()
+    return bool(enumvals) and "lz4" in enumvals
+
+event.listen(
+    BlogPost.__table__,
+    "after_create",
+    DDL(CONTENT_COMPRESSION_DDL).execute_if(dialect="postgresql", callable_=lz4_available)
+)
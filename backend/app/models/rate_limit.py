@@ -0,0 +1,10 @@
+from sqlalchemy import Column, String, DateTime, Float
+from app.db.base import Base
+
+class RateLimitBucket(Base):
+    """Token bucket shared by all workers with the "database" rate limit backend"""
+    __tablename__ = "rate_limit_buckets"
+
+    key = Column(String(128), primary_key=True)
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
@@ -1,5 +1,6 @@
-from typing import Optional, List
-from pydantic import BaseModel
+from datetime import datetime
+from typing import Dict, Optional, List
+from pydantic import BaseModel, Field, model_validator
 
 class BlogPostBase(BaseModel):
     title: str
@@ -20,9 +21,114 @@ class BlogPostUpdate(BlogPostBase):
 class BlogPostInDBBase(BlogPostBase):
     id: int
     user_id: int
+    version: Optional[int] = None
 
     class Config:
         from_attributes = True
 
 class BlogPostResponse(BlogPostInDBBase):
     pass
+
+class TextEdit(BaseModel):
+    """Replace content[start:end] of the base version with text (offsets in Unicode code points)"""
+    start: int = Field(..., ge=0)
+    end: int = Field(..., ge=0)
+    text: str = ""
+
+    @model_validator(mode="after")
+    def check_range(self) -> "TextEdit":
+        if self.end < self.start:
+            raise ValueError("end must not be before start")
+        return self
+
+class BlogPostPatch(BaseModel):
+    """
+    Partial update of a post against the version it was based on
+
+    Only the fields that are set are written. The body can be replaced
+    outright with content, or changed with content_edits against the
+    base version's content.
+    """
+    version: int
+    title: Optional[str] = None
+    summary: Optional[str] = None
+    keywords: Optional[List[str]] = None
+    image_url: Optional[str] = None
+    status: Optional[str] = None
+    content: Optional[str] = None
+    content_edits: Optional[List[TextEdit]] = Field(None, max_length=500)
+
+    @model_validator(mode="after")
+    def check_edits(self) -> "BlogPostPatch":
+        for field in ("title", "content"):
+            if field in self.model_fields_set and getattr(self, field) is None:
+                raise ValueError(f"{field} cannot be null")
+        if self.content is not None and self.content_edits is not None:
+            raise ValueError("Send either content or content_edits, not both")
+        edits = self.content_edits or []
+        for previous, edit in zip(edits, edits[1:]):
+            if edit.start < previous.end:
+                raise ValueError("content_edits must be sorted and must not overlap")
+        return self
+
+class BlogPostPatchResponse(BaseModel):
+    id: int
+    version: int
+    updated_at: Optional[datetime] = None
+
+class BlogPostListItem(BaseModel):
+    """A post as shown in listings, without the HTML body"""
+    id: int
+    user_id: int
+    title: str
+    summary: Optional[str] = None
+    keywords: Optional[List[str]] = None
+    image_url: Optional[str] = None
+    status: Optional[str] = "draft"
+    wordpress_post_id: Optional[int] = None
+    version: Optional[int] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class BlogPostPage(BaseModel):
+    items: List[BlogPostListItem]
+    # Pass back as ?cursor= to get the next page; None on the last page
+    next_cursor: Optional[str] = None
+
+class BlogPostSearchResult(BlogPostListItem):
+    rank: float
+    # Matching excerpt with the search terms wrapped in <mark> tags
+    snippet: str
+
+class BlogPostSearchPage(BaseModel):
+    items: List[BlogPostSearchResult]
+    # Pass back as ?offset= to get the next page; None on the last page
+    next_offset: Optional[int] = None
+
+class BlogPostStats(BaseModel):
+    total: int
+    by_status: Dict[str, int]
+
+class BulkPublishRequest(BaseModel):
+    post_ids: List[int] = Field(..., min_length=1, max_length=100)
+
+class BulkPublishResult(BaseModel):
+    post_id: int
+    success: bool
+    wordpress_post_id: Optional[int] = None
+    error: Optional[str] = None
+
+class BulkPublishResponse(BaseModel):
+    published: int
+    failed: int
+    results: List[BulkPublishResult]
+
+class GeneratedBlogPost(BaseModel):
+    """Shape of the JSON object returned by structured blog generation"""
+    title: str
+    content: str
+    keywords: List[str] = []
+    summary: str = ""
@@ -1,7 +1,13 @@
-from typing import Dict, Optional
-import openai
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional, Tuple
+from fastapi import HTTPException
 from app.core.config import settings
+from app.schemas.blog import GeneratedBlogPost
+from app.services.generation_cache import GenerationCache, get_generation_cache, make_cache_key
+from app.services.openai_client import chat_slots, create_chat_completion, get_openai_client
+from app.utils.helpers import extract_first_heading, split_text
+import asyncio
 import logging
+import time
 import traceback
 
 # Configure logging
@@ -10,7 +16,6 @@ logger = logging.getLogger(__name__)
 
 # Configure OpenAI
 logger.debug(f"OpenAI API Key length: {len(settings.OPENAI_API_KEY) if settings.OPENAI_API_KEY else 0}")
-openai.api_key = settings.OPENAI_API_KEY
 
 DEFAULT_PROMPT = """Please analyze the following legal judgment and create a well-structured blog post. The blog post should:
 1. Have a clear and engaging introduction that highlights the key legal issue and outcome
@@ -65,95 +70,478 @@ For example:
 
 Please ensure the title accurately represents the judgment while being engaging and informative."""
 
+STRUCTURED_OUTPUT_INSTRUCTIONS = """Respond with a single JSON object and nothing else. The object must have exactly these keys:
+- "title": the blog post title (max 100 characters), following the title format described above
+- "content": the full blog post as an HTML string
+- "keywords": a list of 5-7 relevant keywords
+- "summary": a brief summary of the blog post (max 200 characters)"""
+
+# Sentinel for stages that must propagate their errors
+_NO_DEFAULT = object()
+
+CHUNK_SUMMARY_SYSTEM_PROMPT = "You are a legal analyst who takes detailed, faithful notes on judgments. Preserve party names, facts, legal issues, arguments, statutes, precedents and citations, the court's reasoning and the outcome. Do not add information that is not in the text."
+
+CONDENSED_CONTENT_NOTE = "The judgment is too long to include in full. Below are section-by-section notes covering the entire judgment in order."
+
+CONTENT_SYSTEM_PROMPT = "You are a professional blog writer who creates engaging, well-structured content with proper HTML formatting. Focus on readability and visual appeal."
+
 class AIService:
     MODEL_NAME = "gpt-4o-mini"  # Using GPT-4O Mini model for all content generation
     
     @staticmethod
-    async def process_content(content: str, custom_prompt: Optional[str] = None) -> Dict[str, str]:
+    async def generate_structured(prompt: str) -> Dict[str, Any]:
         """
-        Process content using GPT-4O Mini to generate a blog post.
+        Generate the blog post and its metadata in a single JSON-mode call.
         
         Args:
-            content: The content to process
-            custom_prompt: Optional custom prompt to use instead of the default
+            prompt: The fully formatted generation prompt
             
         Returns:
-            Dict containing the processed content and metadata
+            Dict with title, content, keywords and summary
         """
+        logger.debug("Making OpenAI API call for structured blog generation")
+        response = await create_chat_completion(
+            model=AIService.MODEL_NAME,
+            messages=[
+                {"role": "system", "content": f"{CONTENT_SYSTEM_PROMPT}\n\n{STRUCTURED_OUTPUT_INSTRUCTIONS}"},
+                {"role": "user", "content": prompt}
+            ],
+            response_format={"type": "json_object"},
+            temperature=0.7,
+            max_tokens=2500
+        )
+        
+        generated = GeneratedBlogPost.model_validate_json(response.choices[0].message.content)
+        logger.debug("Successfully generated structured blog post")
+        return {
+            "title": generated.title.strip(),
+            "content": generated.content,
+            "keywords": [k.strip() for k in generated.keywords if k.strip()],
+            "summary": generated.summary.strip()
+        }
+    
+    @staticmethod
+    async def _timed_call(
+        stage: str,
+        coro: Awaitable[Any],
+        timings: Dict[str, float],
+        timeout: Optional[float] = None,
+        default: Any = _NO_DEFAULT,
+        fallbacks: Optional[List[str]] = None
+    ) -> Any:
+        """
+        Await a generation stage, recording its latency in timings.
+        
+        If a default is given, a timeout or error in this stage is logged and
+        the default returned instead of failing the whole generation; the
+        stage is then appended to fallbacks.
+        """
+        started = time.perf_counter()
         try:
-            # Use custom prompt if provided, otherwise use default
-            prompt = custom_prompt if custom_prompt else DEFAULT_PROMPT
-            prompt = prompt.format(content=content)
+            return await asyncio.wait_for(coro, timeout=timeout)
+        except Exception as e:
+            if default is _NO_DEFAULT:
+                raise
+            logger.warning(f"{stage} generation failed, using fallback: {type(e).__name__}: {str(e)}")
+            if fallbacks is not None:
+                fallbacks.append(stage)
+            return default
+        finally:
+            timings[stage] = round(time.perf_counter() - started, 3)
+    
+    @staticmethod
+    async def generate_title(generated_content: str) -> str:
+        """Generate a title for the generated blog post"""
+        logger.debug("Making OpenAI API call for title generation")
+        title_response = await create_chat_completion(
+            model=AIService.MODEL_NAME,
+            messages=[
+                {"role": "system", "content": "You are a legal content writer who creates clear and informative titles for legal judgments. Follow this format: '[Case Name/Parties] v. [Case Name/Parties]: [Key Legal Issue] - [Outcome]'. Make the title concise but informative, highlighting the key legal issue and outcome."},
+                {"role": "user", "content": f"Create a compelling title for this legal judgment (max 100 characters):\n\n{generated_content}"}
+            ],
+            temperature=0.7,
+            max_tokens=100
+        )
+        logger.debug("Successfully generated title")
+        return title_response.choices[0].message.content.strip()
+    
+    @staticmethod
+    async def generate_keywords(generated_content: str) -> List[str]:
+        """Extract keywords from the generated blog post"""
+        logger.debug("Making OpenAI API call for keywords generation")
+        keywords_response = await create_chat_completion(
+            model=AIService.MODEL_NAME,
+            messages=[
+                {"role": "system", "content": "You are a professional content strategist who identifies relevant keywords."},
+                {"role": "user", "content": f"Extract 5-7 relevant keywords from this blog post:\n\n{generated_content}"}
+            ],
+            temperature=0.3,
+            max_tokens=100
+        )
+        logger.debug("Successfully generated keywords")
+        return [k.strip() for k in keywords_response.choices[0].message.content.split(',')]
+    
+    @staticmethod
+    async def generate_summary(generated_content: str) -> str:
+        """Generate a short summary of the generated blog post"""
+        logger.debug("Making OpenAI API call for summary generation")
+        summary_response = await create_chat_completion(
+            model=AIService.MODEL_NAME,
+            messages=[
+                {"role": "system", "content": "You are a professional content summarizer. Create a concise summary that captures the key points of the legal judgment."},
+                {"role": "user", "content": f"Create a brief summary (max 200 characters) of this blog post:\n\n{generated_content}"}
+            ],
+            temperature=0.3,
+            max_tokens=100
+        )
+        logger.debug("Successfully generated summary")
+        return summary_response.choices[0].message.content.strip()
+    
+    @staticmethod
+    def metadata_calls(
+        generated_content: str,
+        timings: Dict[str, float],
+        fallbacks: List[str]
+    ) -> Dict[str, Awaitable[Any]]:
+        """
+        Build the title, keywords and summary calls for a blog post.
+        
+        Each call has its own timeout; a failed call degrades to a fallback
+        value instead of failing the upload, and is named in fallbacks.
+        """
+        timeout = settings.AI_METADATA_TIMEOUT_SECONDS
+        return {
+            "title": AIService._timed_call(
+                "title",
+                AIService.generate_title(generated_content),
+                timings,
+                timeout,
+                default=extract_first_heading(generated_content) or "Untitled",
+                fallbacks=fallbacks
+            ),
+            "keywords": AIService._timed_call(
+                "keywords",
+                AIService.generate_keywords(generated_content),
+                timings,
+                timeout,
+                default=[],
+                fallbacks=fallbacks
+            ),
+            "summary": AIService._timed_call(
+                "summary",
+                AIService.generate_summary(generated_content),
+                timings,
+                timeout,
+                default="",
+                fallbacks=fallbacks
+            ),
+        }
+    
+    @staticmethod
+    async def generate_metadata(
+        generated_content: str,
+        timings: Dict[str, float],
+        fallbacks: List[str]
+    ) -> Dict[str, Any]:
+        """
+        Generate title, keywords and summary for a blog post concurrently.
+        
+        The three calls only depend on the generated content, so they are
+        fanned out together.
+        
+        Args:
+            generated_content: The generated blog post HTML
+            timings: Dict that receives the per-stage latency in seconds
+            fallbacks: List that receives the stages that fell back to a default
             
-            logger.debug("Making OpenAI API call for content generation")
-            # Call GPT-4O Mini
-            response = openai.chat.completions.create(
+        Returns:
+            Dict with title, keywords and summary
+        """
+        calls = AIService.metadata_calls(generated_content, timings, fallbacks)
+        values = await asyncio.gather(*calls.values())
+        return dict(zip(calls.keys(), values))
+    
+    @staticmethod
+    async def generate_per_field(prompt: str, timings: Dict[str, float], fallbacks: List[str]) -> Dict[str, Any]:
+        """
+        Generate the blog post body, then derive title, keywords and summary
+        from it.
+        
+        Args:
+            prompt: The fully formatted generation prompt
+            timings: Dict that receives the per-stage latency in seconds
+            fallbacks: List that receives the stages that fell back to a default
+            
+        Returns:
+            Dict with title, content, keywords and summary
+        """
+        logger.debug("Making OpenAI API call for content generation")
+        # Call GPT-4O Mini
+        response = await AIService._timed_call(
+            "content",
+            create_chat_completion(
                 model=AIService.MODEL_NAME,
                 messages=[
-                    {"role": "system", "content": "You are a professional blog writer who creates engaging, well-structured content with proper HTML formatting. Focus on readability and visual appeal."},
+                    {"role": "system", "content": CONTENT_SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.7,
                 max_tokens=2000
+            ),
+            timings
+        )
+        
+        logger.debug("Successfully generated content")
+        # Extract the generated content
+        generated_content = response.choices[0].message.content
+        
+        metadata = await AIService.generate_metadata(generated_content, timings, fallbacks)
+        return {
+            "title": metadata["title"],
+            "content": generated_content,
+            "keywords": metadata["keywords"],
+            "summary": metadata["summary"]
+        }
+    
+    @staticmethod
+    async def summarize_chunk(chunk: str, index: int, total: int) -> str:
+        """Summarize one part of a long judgment (the map step)"""
+        logger.debug(f"Making OpenAI API call to summarize chunk {index}/{total}")
+        response = await create_chat_completion(
+            model=AIService.MODEL_NAME,
+            messages=[
+                {"role": "system", "content": CHUNK_SUMMARY_SYSTEM_PROMPT},
+                {"role": "user", "content": f"Take notes on part {index} of {total} of a legal judgment:\n\n{chunk}"}
+            ],
+            temperature=0.2,
+            max_tokens=settings.AI_CHUNK_SUMMARY_MAX_TOKENS
+        )
+        return response.choices[0].message.content.strip()
+    
+    @staticmethod
+    async def condense_content(content: str, timings: Dict[str, float]) -> str:
+        """
+        Shrink a judgment that is too long for a single prompt.
+        
+        The text is split on paragraph and section boundaries with overlap
+        and each chunk is summarized concurrently (bounded by
+        AI_CHUNK_CONCURRENCY). The notes replace the original text for the
+        final blog generation, which acts as the reduce step. If the notes
+        are themselves too long, they are condensed again.
+        
+        Args:
+            content: The extracted judgment text
+            timings: Dict that receives the per-stage latency in seconds
+            
+        Returns:
+            The content unchanged if it fits, otherwise the combined notes
+        """
+        if len(content) <= settings.AI_CHUNK_THRESHOLD_CHARS:
+            return content
+        
+        semaphore = asyncio.Semaphore(settings.AI_CHUNK_CONCURRENCY)
+        
+        async def summarize(chunk: str, index: int, total: int) -> str:
+            async with semaphore:
+                return await AIService.summarize_chunk(chunk, index, total)
+        
+        for round_number in range(1, settings.AI_CHUNK_MAX_ROUNDS + 1):
+            chunks = split_text(content, settings.AI_CHUNK_SIZE_CHARS, settings.AI_CHUNK_OVERLAP_CHARS)
+            logger.info(f"Condensing {len(content)} characters in {len(chunks)} chunks (round {round_number})")
+            notes = await AIService._timed_call(
+                f"map_round_{round_number}",
+                asyncio.gather(*[
+                    summarize(chunk, index, len(chunks))
+                    for index, chunk in enumerate(chunks, start=1)
+                ]),
+                timings
+            )
+            content = "\n\n".join(
+                f"Part {index} of {len(notes)}:\n{note}"
+                for index, note in enumerate(notes, start=1)
             )
+            if len(content) <= settings.AI_CHUNK_THRESHOLD_CHARS:
+                break
+        
+        return f"{CONDENSED_CONTENT_NOTE}\n\n{content}"
+    
+    @staticmethod
+    async def _cache_lookup(cache: Optional[GenerationCache], key: str) -> Optional[Dict[str, Any]]:
+        if cache is None:
+            return None
+        try:
+            return await cache.get(key)
+        except Exception as e:
+            logger.warning(f"Generation cache lookup failed: {str(e)}")
+            return None
+    
+    @staticmethod
+    async def _cache_store(
+        cache: Optional[GenerationCache],
+        key: str,
+        result: Dict[str, Any],
+        fallbacks: List[str]
+    ) -> None:
+        if cache is None:
+            return
+        if fallbacks:
+            # A fallback value would be served for the whole TTL; let the next upload retry
+            logger.info(f"Not caching blog generation, {', '.join(fallbacks)} used a fallback")
+            return
+        try:
+            await cache.set(key, AIService.MODEL_NAME, result)
+        except Exception as e:
+            logger.warning(f"Generation cache store failed: {str(e)}")
+    
+    @staticmethod
+    async def process_content(content: str, custom_prompt: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Process content using GPT-4O Mini to generate a blog post.
+        
+        Results are cached by a hash of the content, prompt template and
+        model, so re-uploading the same document is served from the cache.
+        Content longer than AI_CHUNK_THRESHOLD_CHARS is first condensed with
+        a concurrent map step (see condense_content).
+        When structured output is enabled the post and its metadata come back
+        from a single JSON-mode call; if that call fails or returns an invalid
+        object, the per-field calls are used instead.
+        
+        Args:
+            content: The content to process
+            custom_prompt: Optional custom prompt to use instead of the default
             
-            logger.debug("Successfully generated content")
-            # Extract the generated content
-            generated_content = response.choices[0].message.content
+        Returns:
+            Dict containing the processed content and metadata, plus the
+            per-stage latency breakdown under "timings"
+        """
+        try:
+            # Use custom prompt if provided, otherwise use default
+            prompt_template = custom_prompt if custom_prompt else DEFAULT_PROMPT
             
-            logger.debug("Making OpenAI API call for title generation")
-            # Generate a title from the content
-            title_response = openai.chat.completions.create(
-                model=AIService.MODEL_NAME,
-                messages=[
-                    {"role": "system", "content": "You are a legal content writer who creates clear and informative titles for legal judgments. Follow this format: '[Case Name/Parties] v. [Case Name/Parties]: [Key Legal Issue] - [Outcome]'. Make the title concise but informative, highlighting the key legal issue and outcome."},
-                    {"role": "user", "content": f"Create a compelling title for this legal judgment (max 100 characters):\n\n{generated_content}"}
-                ],
-                temperature=0.7,
-                max_tokens=100
-            )
+            timings: Dict[str, float] = {}
+            fallbacks: List[str] = []
+            started = time.perf_counter()
+            result = None
             
-            logger.debug("Successfully generated title")
-            title = title_response.choices[0].message.content.strip()
+            cache = get_generation_cache()
+            cache_key = make_cache_key(content, prompt_template, AIService.MODEL_NAME)
+            cached = await AIService._cache_lookup(cache, cache_key)
+            if cached is not None:
+                timings["total"] = round(time.perf_counter() - started, 3)
+                logger.info("Serving blog generation from cache")
+                cached["timings"] = timings
+                return cached
             
-            logger.debug("Making OpenAI API call for keywords generation")
-            # Generate keywords
-            keywords_response = openai.chat.completions.create(
-                model=AIService.MODEL_NAME,
-                messages=[
-                    {"role": "system", "content": "You are a professional content strategist who identifies relevant keywords."},
-                    {"role": "user", "content": f"Extract 5-7 relevant keywords from this blog post:\n\n{generated_content}"}
-                ],
-                temperature=0.3,
-                max_tokens=100
+            # Long judgments are summarized chunk by chunk before generation
+            prompt = prompt_template.format(
+                content=await AIService.condense_content(content, timings)
             )
             
-            logger.debug("Successfully generated keywords")
-            keywords = [k.strip() for k in keywords_response.choices[0].message.content.split(',')]
+            if settings.AI_STRUCTURED_OUTPUT:
+                try:
+                    result = await AIService._timed_call(
+                        "structured",
+                        AIService.generate_structured(prompt),
+                        timings
+                    )
+                except HTTPException:
+                    # Admission errors (e.g. OpenAI call queue full) go straight to the client
+                    raise
+                except Exception as e:
+                    logger.warning(f"Structured generation failed, falling back to per-field calls: {str(e)}")
             
-            # Generate a proper summary using GPT-4O Mini
-            logger.debug("Making OpenAI API call for summary generation")
-            summary_response = openai.chat.completions.create(
-                model=AIService.MODEL_NAME,
-                messages=[
-                    {"role": "system", "content": "You are a professional content summarizer. Create a concise summary that captures the key points of the legal judgment."},
-                    {"role": "user", "content": f"Create a brief summary (max 200 characters) of this blog post:\n\n{generated_content}"}
-                ],
-                temperature=0.3,
-                max_tokens=100
-            )
+            if result is None:
+                result = await AIService.generate_per_field(prompt, timings, fallbacks)
             
-            logger.debug("Successfully generated summary")
-            summary = summary_response.choices[0].message.content.strip()
+            await AIService._cache_store(cache, cache_key, result, fallbacks)
             
-            return {
-                "title": title,
-                "content": generated_content,
-                "keywords": keywords,
-                "summary": summary
-            }
+            timings["total"] = round(time.perf_counter() - started, 3)
+            logger.info(f"Blog generation stage timings (s): {timings}")
+            result["timings"] = timings
+            return result
             
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error processing content with GPT-4O Mini: {str(e)}")
             logger.error(f"Traceback: {traceback.format_exc()}")
             raise Exception(f"Error processing content with GPT-4O Mini: {str(e)}")
+    
+    @staticmethod
+    async def stream_content(content: str, custom_prompt: Optional[str] = None) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Generate a blog post, yielding (event, data) pairs as results arrive.
+        
+        Events are "content" for each chunk of generated HTML, then "title",
+        "keywords" and "summary" in the order they finish, and finally
+        "done" with the stage timings. Structured output is not used here
+        because the body has to be streamed on its own; a cached result is
+        replayed as a single content event.
+        
+        Args:
+            content: The content to process
+            custom_prompt: Optional custom prompt to use instead of the default
+        """
+        prompt_template = custom_prompt if custom_prompt else DEFAULT_PROMPT
+        timings: Dict[str, float] = {}
+        fallbacks: List[str] = []
+        started = time.perf_counter()
+        
+        cache = get_generation_cache()
+        cache_key = make_cache_key(content, prompt_template, AIService.MODEL_NAME)
+        cached = await AIService._cache_lookup(cache, cache_key)
+        if cached is not None:
+            logger.info("Serving streamed blog generation from cache")
+            for field in ("content", "title", "keywords", "summary"):
+                yield field, cached[field]
+            timings["total"] = round(time.perf_counter() - started, 3)
+            yield "done", {"cached": True, "timings": timings}
+            return
+        
+        prompt = prompt_template.format(
+            content=await AIService.condense_content(content, timings)
+        )
+        
+        client = get_openai_client()
+        logger.debug("Making streaming OpenAI API call for content generation")
+        content_started = time.perf_counter()
+        parts: List[str] = []
+        # The chat slot is held until the whole body has streamed
+        async with chat_slots.slot():
+            stream = await client.chat.completions.create(
+                model=AIService.MODEL_NAME,
+                messages=[
+                    {"role": "system", "content": CONTENT_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.7,
+                max_tokens=2000,
+                stream=True
+            )
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if not parts:
+                        timings["first_token"] = round(time.perf_counter() - content_started, 3)
+                    parts.append(delta)
+                    yield "content", delta
+        timings["content"] = round(time.perf_counter() - content_started, 3)
+        generated_content = "".join(parts)
+        
+        async def labelled(name: str, call: Awaitable[Any]) -> Tuple[str, Any]:
+            return name, await call
+        
+        result: Dict[str, Any] = {"content": generated_content}
+        calls = AIService.metadata_calls(generated_content, timings, fallbacks)
+        for finished in asyncio.as_completed([labelled(name, call) for name, call in calls.items()]):
+            name, value = await finished
+            result[name] = value
+            yield name, value
+        
+        await AIService._cache_store(cache, cache_key, result, fallbacks)
+        
+        timings["total"] = round(time.perf_counter() - started, 3)
+        logger.info(f"Streamed blog generation stage timings (s): {timings}")
+        yield "done", {"cached": False, "timings": timings}
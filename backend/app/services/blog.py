@@ -1,16 +1,67 @@
-from typing import Optional, List
-from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, List, Tuple
+from sqlalchemy import ColumnElement, Row, func, literal, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.base import AsyncSessionLocal
 from app.models.blog import BlogPost
 from app.models.user import User
-from app.schemas.blog import BlogPostCreate, BlogPostUpdate
-from app.services.wordpress import WordPressService
+from app.schemas.blog import BlogPostCreate, BlogPostPatch, BlogPostUpdate, TextEdit
+from app.services.wordpress import WordPressService, wordpress_clients
+from app.utils.helpers import decode_cursor, encode_cursor
+import asyncio
+import hashlib
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+# How far before an interrupted create to look for the post it may have made
+CREATE_LOOKBACK = timedelta(minutes=5)
+
+# Columns returned by listings; content is only loaded for a single post
+LIST_COLUMNS = (
+    BlogPost.id,
+    BlogPost.user_id,
+    BlogPost.title,
+    BlogPost.summary,
+    BlogPost.keywords,
+    BlogPost.image_url,
+    BlogPost.status,
+    BlogPost.wordpress_post_id,
+    BlogPost.version,
+    BlogPost.created_at,
+    BlogPost.updated_at,
+)
+
+# Columns of a single post as returned by the API (BlogPostResponse)
+POST_COLUMNS = (
+    BlogPost.id,
+    BlogPost.user_id,
+    BlogPost.title,
+    BlogPost.content,
+    BlogPost.summary,
+    BlogPost.keywords,
+    BlogPost.image_url,
+    BlogPost.status,
+    BlogPost.wordpress_post_id,
+    BlogPost.version,
+    BlogPost.updated_at,
+)
+
+# Columns that identify a revision of a post: returned by a patch (the
+# client already has everything else) and used for ETags
+REVISION_COLUMNS = (BlogPost.id, BlogPost.version, BlogPost.updated_at)
+
+class VersionConflict(Exception):
+    """The post was changed since the version a patch was based on"""
+
+    def __init__(self, current_version: int):
+        super().__init__(f"Post is at version {current_version}")
+        self.current_version = current_version
+
 class BlogService:
     @staticmethod
-    async def create_post(db: Session, post: BlogPostCreate, user_id: int) -> BlogPost:
+    async def create_post(db: AsyncSession, post: BlogPostCreate, user_id: int) -> BlogPost:
         """Create a new blog post"""
         db_post = BlogPost(
             title=post.title,
@@ -22,63 +73,215 @@ class BlogService:
             user_id=user_id
         )
         db.add(db_post)
-        db.commit()
-        db.refresh(db_post)
+        await db.commit()
+        await db.refresh(db_post)
         return db_post
 
     @staticmethod
     async def update_post(
-        db: Session,
+        db: AsyncSession,
         post_id: int,
         post: BlogPostUpdate,
         user_id: int
     ) -> BlogPost:
         """Update an existing blog post"""
-        db_post = db.query(BlogPost).filter(
-            BlogPost.id == post_id,
-            BlogPost.user_id == user_id
-        ).first()
+        db_post = await BlogService.get_post(db, post_id, user_id)
         
         if not db_post:
             raise Exception("Post not found")
             
         for field, value in post.dict(exclude_unset=True).items():
             setattr(db_post, field, value)
+        db_post.version = BlogPost.version + 1
             
-        db.commit()
-        db.refresh(db_post)
+        await db.commit()
+        await db.refresh(db_post)
         return db_post
 
     @staticmethod
-    async def publish_post(db: Session, post_id: int, user_id: int) -> BlogPost:
-        """Publish a blog post to WordPress"""
-        db_post = db.query(BlogPost).filter(
+    def _apply_edits(edits: List[TextEdit]) -> ColumnElement:
+        """
+        Build a SQL expression for the content with the edits applied
+
+        The result is stitched together from slices of the stored content
+        and the new text, so only the edits travel to the database. Edits
+        are sorted and non-overlapping, with 0-based offsets into the base
+        content; substr() is 1-based.
+        """
+        content = func.coalesce(BlogPost.content, "")
+        pieces = []
+        position = 0
+        for edit in edits:
+            if edit.start > position:
+                pieces.append(func.substr(content, position + 1, edit.start - position))
+            if edit.text:
+                pieces.append(literal(edit.text))
+            position = edit.end
+        pieces.append(func.substr(content, position + 1))
+
+        expression = pieces[0]
+        for piece in pieces[1:]:
+            expression = expression.concat(piece)
+        return expression
+
+    @staticmethod
+    async def patch_post(
+        db: AsyncSession,
+        post_id: int,
+        patch: BlogPostPatch,
+        user_id: int
+    ) -> Optional[Row]:
+        """
+        Apply a partial update in a single UPDATE ... RETURNING
+
+        Only the fields set on the patch are written, and the version must
+        still match the one the patch was based on.
+
+        Returns:
+            The row's id, new version and updated_at, or None if the post
+            does not exist
+
+        Raises:
+            VersionConflict: the post has moved on from patch.version
+            ValueError: content_edits reach past the end of the content
+        """
+        values = patch.dict(exclude_unset=True, exclude={"version", "content_edits"})
+        conditions = [
             BlogPost.id == post_id,
-            BlogPost.user_id == user_id
-        ).first()
+            BlogPost.user_id == user_id,
+            BlogPost.version == patch.version,
+        ]
+        if patch.content_edits:
+            values["content"] = BlogService._apply_edits(patch.content_edits)
+            conditions.append(
+                func.length(func.coalesce(BlogPost.content, "")) >= max(edit.end for edit in patch.content_edits)
+            )
+
+        result = await db.execute(
+            update(BlogPost)
+            .where(*conditions)
+            .values(**values, version=BlogPost.version + 1)
+            .returning(*REVISION_COLUMNS)
+        )
+        row = result.first()
+        if row is not None:
+            await db.commit()
+            return row
+
+        await db.rollback()
+        current_version = (await db.execute(
+            select(BlogPost.version).where(BlogPost.id == post_id, BlogPost.user_id == user_id)
+        )).scalar()
+        if current_version is None:
+            return None
+        if current_version != patch.version:
+            raise VersionConflict(current_version)
+        raise ValueError("content_edits do not fit the current content")
+
+    @staticmethod
+    def _field_hash(value: Any) -> str:
+        return hashlib.sha256(json.dumps(value, sort_keys=True).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    async def _checkpoint(post: BlogPost, **values: Any) -> None:
+        """
+        Record publish progress on the post right away
+        
+        The values are written in their own short transaction, so a failure
+        later in the publish (or in the caller's transaction) does not lose
+        work that already happened in WordPress.
+        """
+        for field, value in values.items():
+            setattr(post, field, value)
+        async with AsyncSessionLocal() as checkpoint_db:
+            await checkpoint_db.execute(
+                update(BlogPost).where(BlogPost.id == post.id).values(**values)
+            )
+            await checkpoint_db.commit()
+
+    @staticmethod
+    async def _publish_to_wordpress(post: BlogPost, user: User) -> int:
+        """
+        Create or update the WordPress copy of a post, resuming earlier attempts
+        
+        Each step is checkpointed on the post:
+        - the featured image is uploaded once per image URL and its media ID reused
+        - a post that already exists in WordPress is updated with only the
+          fields whose hashes changed, and skipped when nothing changed
+        - a create whose response was lost is found again instead of repeated
+        """
+        state = dict(post.wordpress_sync_state or {})
+        
+        featured_media = None
+        if post.image_url:
+            if post.wordpress_media_id and post.wordpress_media_source == post.image_url:
+                featured_media = post.wordpress_media_id
+            else:
+                featured_media = await WordPressService.upload_media(post.image_url, user)
+                if featured_media is not None:
+                    await BlogService._checkpoint(
+                        post,
+                        wordpress_media_id=featured_media,
+                        wordpress_media_source=post.image_url
+                    )
+        
+        fields = {"title": post.title, "content": post.content, "status": "publish"}
+        if featured_media is not None:
+            fields["featured_media"] = featured_media
+        hashes = {field: BlogService._field_hash(value) for field, value in fields.items()}
+        
+        if post.wordpress_post_id is None and state.get("create_started_at"):
+            started_at = datetime.fromisoformat(state["create_started_at"])
+            found_id = await WordPressService.find_post(post.title, started_at - CREATE_LOOKBACK, user)
+            if found_id is not None:
+                logger.info(f"Found WordPress post {found_id} from an interrupted publish of post {post.id}")
+                # What the earlier attempt sent is unknown, so update every field
+                state = {}
+                await BlogService._checkpoint(post, wordpress_post_id=found_id, wordpress_sync_state=state)
+        
+        if post.wordpress_post_id is not None:
+            synced = state.get("hashes", {})
+            changed = {field: value for field, value in fields.items() if synced.get(field) != hashes[field]}
+            if not changed:
+                logger.info(f"Post {post.id} is unchanged since it was last published, skipping")
+                return post.wordpress_post_id
+            if await WordPressService.update_post(post.wordpress_post_id, changed, user):
+                await BlogService._checkpoint(post, wordpress_sync_state={"hashes": hashes})
+                return post.wordpress_post_id
+            logger.warning(f"WordPress post {post.wordpress_post_id} no longer exists, publishing post {post.id} again")
+        
+        await BlogService._checkpoint(post, wordpress_sync_state={"create_started_at": datetime.utcnow().isoformat()})
+        wordpress_id = await WordPressService.publish_post(
+            title=post.title,
+            content=post.content,
+            user=user,
+            featured_media=featured_media
+        )
+        await BlogService._checkpoint(post, wordpress_post_id=wordpress_id, wordpress_sync_state={"hashes": hashes})
+        return wordpress_id
+
+    @staticmethod
+    async def publish_post(db: AsyncSession, post_id: int, user_id: int) -> BlogPost:
+        """Publish a blog post to WordPress"""
+        db_post = await BlogService.get_post(db, post_id, user_id)
         
         if not db_post:
             raise Exception("Post not found")
             
         # Get the user
-        user = db.query(User).filter(User.id == user_id).first()
+        user = await db.get(User, user_id)
         if not user:
             raise Exception("User not found")
             
         try:
             # Publish to WordPress
-            wordpress_id = await WordPressService.publish_post(
-                title=db_post.title,
-                content=db_post.content,
-                user=user,
-                image_url=db_post.image_url
-            )
+            wordpress_id = await BlogService._publish_to_wordpress(db_post, user)
             
             # Update the post with WordPress ID and status
             db_post.wordpress_post_id = wordpress_id
             db_post.status = "published"
-            db.commit()
-            db.refresh(db_post)
+            await db.commit()
+            await db.refresh(db_post)
             
             return db_post
             
@@ -87,29 +290,142 @@ class BlogService:
             raise Exception(f"Failed to publish post: {str(e)}")
 
     @staticmethod
-    def get_post(db: Session, post_id: int, user_id: int) -> Optional[BlogPost]:
+    async def publish_posts(db: AsyncSession, post_ids: List[int], user_id: int) -> List[Dict]:
+        """
+        Publish several blog posts to WordPress concurrently
+        
+        Publishes to a site are bounded by its per-site concurrency limit.
+        Requests are retried with backoff as with_retry allows: creates only
+        when WordPress cannot have stored them (429, connection errors),
+        updates and lookups also on 5xx. All status updates are committed in
+        one transaction at the end.
+        
+        Returns:
+            One result dict per requested post ID, in request order
+        """
+        post_ids = list(dict.fromkeys(post_ids))
+        result = await db.execute(
+            select(BlogPost).where(
+                BlogPost.id.in_(post_ids),
+                BlogPost.user_id == user_id
+            )
+        )
+        posts = {post.id: post for post in result.scalars()}
+        
+        user = await db.get(User, user_id)
+        if not user:
+            raise Exception("User not found")
+        
+        async def publish_one(post: BlogPost) -> int:
+            if not user.wordpress_url:
+                raise Exception("WordPress settings not configured for user")
+            async with wordpress_clients.get_semaphore(user.wordpress_url):
+                return await BlogService._publish_to_wordpress(post, user)
+        
+        to_publish = [posts[post_id] for post_id in post_ids if post_id in posts]
+        outcomes = dict(zip(
+            [post.id for post in to_publish],
+            await asyncio.gather(*[publish_one(post) for post in to_publish], return_exceptions=True)
+        ))
+        
+        results = []
+        for post_id in post_ids:
+            outcome = outcomes.get(post_id, Exception("Post not found"))
+            if isinstance(outcome, BaseException):
+                logger.error(f"Error publishing post {post_id} to WordPress: {str(outcome)}")
+                results.append({"post_id": post_id, "success": False, "error": str(outcome)})
+                continue
+            post = posts[post_id]
+            post.wordpress_post_id = outcome
+            post.status = "published"
+            results.append({"post_id": post_id, "success": True, "wordpress_post_id": outcome})
+        
+        await db.commit()
+        return results
+
+    @staticmethod
+    async def get_post(db: AsyncSession, post_id: int, user_id: int) -> Optional[BlogPost]:
         """Get a blog post by ID"""
-        return db.query(BlogPost).filter(
-            BlogPost.id == post_id,
-            BlogPost.user_id == user_id
-        ).first()
+        result = await db.execute(
+            select(BlogPost).where(
+                BlogPost.id == post_id,
+                BlogPost.user_id == user_id
+            )
+        )
+        return result.scalars().first()
+
+    @staticmethod
+    async def get_post_row(db: AsyncSession, post_id: int, user_id: int) -> Optional[Row]:
+        """Get a blog post's API columns as a row, without building an ORM object"""
+        result = await db.execute(
+            select(*POST_COLUMNS).where(
+                BlogPost.id == post_id,
+                BlogPost.user_id == user_id
+            )
+        )
+        return result.first()
+
+    @staticmethod
+    async def get_post_revision(db: AsyncSession, post_id: int, user_id: int) -> Optional[Row]:
+        """Get a post's id, version and updated_at without loading the post"""
+        result = await db.execute(
+            select(*REVISION_COLUMNS).where(
+                BlogPost.id == post_id,
+                BlogPost.user_id == user_id
+            )
+        )
+        return result.first()
 
     @staticmethod
-    def get_user_posts(db: Session, user_id: int) -> List[BlogPost]:
-        """Get all posts for a user"""
-        return db.query(BlogPost).filter(BlogPost.user_id == user_id).all()
+    async def get_user_posts(
+        db: AsyncSession,
+        user_id: int,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> Tuple[List[Row], Optional[str]]:
+        """
+        Get one page of a user's posts, newest first, without their content
+        
+        Pages are keyed on (created_at, id) rather than an offset, so each
+        page is an index range scan no matter how deep it is.
+        
+        Returns:
+            The page of rows and the cursor for the next page (None on the last page)
+        """
+        query = select(*LIST_COLUMNS).where(BlogPost.user_id == user_id)
+        if status:
+            query = query.where(BlogPost.status == status)
+        if cursor:
+            created_at, post_id = decode_cursor(cursor)
+            query = query.where(tuple_(BlogPost.created_at, BlogPost.id) < (created_at, post_id))
+        query = query.order_by(BlogPost.created_at.desc(), BlogPost.id.desc()).limit(limit + 1)
+        
+        rows = (await db.execute(query)).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+        return rows, next_cursor
 
     @staticmethod
-    def delete_post(db: Session, post_id: int, user_id: int) -> bool:
+    async def get_post_stats(db: AsyncSession, user_id: int) -> Dict[str, int]:
+        """Count a user's posts by status"""
+        result = await db.execute(
+            select(BlogPost.status, func.count())
+            .where(BlogPost.user_id == user_id)
+            .group_by(BlogPost.status)
+        )
+        return {status or "draft": count for status, count in result.all()}
+
+    @staticmethod
+    async def delete_post(db: AsyncSession, post_id: int, user_id: int) -> bool:
         """Delete a blog post"""
-        db_post = db.query(BlogPost).filter(
-            BlogPost.id == post_id,
-            BlogPost.user_id == user_id
-        ).first()
+        db_post = await BlogService.get_post(db, post_id, user_id)
         
         if not db_post:
             return False
             
-        db.delete(db_post)
-        db.commit()
+        await db.delete(db_post)
+        await db.commit()
         return True
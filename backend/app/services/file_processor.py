@@ -1,11 +1,21 @@
-from typing import Dict, Optional
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+import asyncio
+import io
 import os
 from pathlib import Path
-import docx
-from PyPDF2 import PdfReader
 from fastapi import UploadFile, HTTPException
 import tempfile
 from app.services.ai import AIService
+from app.core.config import settings
+from app.services.text_extraction import (
+    DocumentSource,
+    ExtractedText,
+    ExtractionError,
+    char_budget,
+    extract_docx_text,
+    extract_pdf_text,
+    get_extraction_pool
+)
 import logging
 
 # Configure logging
@@ -15,19 +25,70 @@ class FileProcessor:
     ALLOWED_EXTENSIONS = {'.docx', '.pdf'}
     
     @staticmethod
-    async def save_upload_file_tmp(upload_file: UploadFile) -> Path:
-        """Save uploaded file to a temporary location"""
+    async def read_upload(upload_file: UploadFile) -> DocumentSource:
+        """
+        Read an uploaded file in chunks, enforcing the maximum upload size
+        
+        Files up to UPLOAD_SPOOL_MAX_BYTES are returned as bytes and parsed
+        from memory; larger ones spill to a temporary file whose path is
+        returned instead.
+        """
+        max_bytes = settings.UPLOAD_MAX_BYTES
+        too_large = HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum size is {max_bytes // (1024 * 1024)} MB"
+        )
+        if upload_file.size is not None and upload_file.size > max_bytes:
+            raise too_large
+        
+        logger.debug(f"Reading uploaded file: {upload_file.filename}")
+        buffer = io.BytesIO()
+        spill = None
+        total = 0
         try:
-            logger.debug(f"Saving uploaded file: {upload_file.filename}")
-            suffix = Path(upload_file.filename).suffix
-            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-                content = await upload_file.read()
-                tmp.write(content)
-                logger.debug(f"File saved to: {tmp.name}")
-                return Path(tmp.name)
+            while chunk := await upload_file.read(settings.UPLOAD_CHUNK_BYTES):
+                total += len(chunk)
+                if total > max_bytes:
+                    raise too_large
+                if spill is None and total > settings.UPLOAD_SPOOL_MAX_BYTES:
+                    suffix = Path(upload_file.filename).suffix
+                    # Disk I/O runs in a thread so a slow disk cannot stall the event loop
+                    spill = await asyncio.to_thread(tempfile.NamedTemporaryFile, delete=False, suffix=suffix)
+                    logger.debug(f"Upload exceeds spool size, spilling to: {spill.name}")
+                    await asyncio.to_thread(spill.write, buffer.getbuffer())
+                    buffer = None
+                if spill is not None:
+                    await asyncio.to_thread(spill.write, chunk)
+                else:
+                    buffer.write(chunk)
         except Exception as e:
-            logger.error(f"Error saving file: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Could not save file: {str(e)}")
+            if spill is not None:
+                await asyncio.to_thread(FileProcessor._discard_spill, spill)
+            if isinstance(e, HTTPException):
+                raise
+            logger.error(f"Error reading file: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Could not read file: {str(e)}")
+        
+        if spill is not None:
+            await asyncio.to_thread(spill.close)
+            return Path(spill.name)
+        return buffer.getvalue()
+
+    @staticmethod
+    def _discard_spill(spill: Any) -> None:
+        spill.close()
+        os.unlink(spill.name)
+
+    @classmethod
+    async def read_upload_bytes(cls, upload_file: UploadFile) -> bytes:
+        """Read an uploaded file fully into memory, within the upload size limit"""
+        source = await cls.read_upload(upload_file)
+        if isinstance(source, bytes):
+            return source
+        try:
+            return await asyncio.to_thread(source.read_bytes)
+        finally:
+            os.unlink(source)
 
     @staticmethod
     def validate_file_extension(filename: str) -> bool:
@@ -41,28 +102,27 @@ class FileProcessor:
         return True
 
     @staticmethod
-    def extract_text_from_docx(file_path: Path) -> str:
-        """Extract text from a Word document"""
-        try:
-            doc = docx.Document(file_path)
-            full_text = []
-            for para in doc.paragraphs:
-                full_text.append(para.text)
-            return '\n\n'.join(full_text)
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Could not process Word document: {str(e)}")
-
-    @staticmethod
-    def extract_text_from_pdf(file_path: Path) -> str:
-        """Extract text from a PDF document"""
+    async def extract_text(source: DocumentSource, filename: str) -> ExtractedText:
+        """
+        Extract text from a Word or PDF document in the extraction process pool
+        
+        Extraction stops once the configured character/token budget is
+        reached; the result reports the page count and truncation point.
+        
+        Args:
+            source: The document bytes, or the path of a spilled upload
+            filename: Original filename, used to pick the parser
+        """
+        is_docx = filename.lower().endswith('.docx')
+        extractor = extract_docx_text if is_docx else extract_pdf_text
+        kind = "Word" if is_docx else "PDF"
+        max_chars = char_budget(settings.EXTRACTION_MAX_CHARS, settings.EXTRACTION_MAX_TOKENS)
         try:
-            reader = PdfReader(file_path)
-            full_text = []
-            for page in reader.pages:
-                full_text.append(page.extract_text())
-            return '\n\n'.join(full_text)
+            return await get_extraction_pool().run(extractor, source, max_chars)
+        except ExtractionError as e:
+            raise HTTPException(status_code=422, detail=f"Could not process {kind} document: {str(e)}")
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Could not process PDF document: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Could not process {kind} document: {str(e)}")
 
     @staticmethod
     def generate_summary(content: str) -> str:
@@ -80,6 +140,76 @@ class FileProcessor:
         # In a real implementation, you would use NLP to extract meaningful keywords
         return ["keyword1", "keyword2", "keyword3"]
 
+    @classmethod
+    async def process_document(
+        cls,
+        filename: str,
+        source: DocumentSource,
+        custom_prompt: Optional[str] = None
+    ) -> Dict[str, str]:
+        """
+        Extract text from a document and turn it into a blog post
+        
+        Args:
+            filename: Original filename, used to pick the parser
+            source: The document bytes, or the path of a spilled upload
+            custom_prompt: Optional custom prompt for GPT-4 processing
+        """
+        # Extract text from the file
+        logger.debug("Extracting text from file")
+        extracted = await cls.extract_text(source, filename)
+        content = extracted.text
+        
+        logger.debug(f"Extracted content length: {len(content)}")
+        if extracted.truncated:
+            logger.info(
+                f"Stopped extracting {filename} at part {extracted.truncated_at} "
+                f"(pages: {extracted.page_count}) after reaching the text budget"
+            )
+        
+        # Process content with GPT-4
+        logger.debug("Processing content with GPT-4")
+        processed_content = await AIService.process_content(content, custom_prompt)
+        
+        return {
+            "filename": filename,
+            "content": processed_content["content"],
+            "title": processed_content["title"],
+            "keywords": processed_content["keywords"],
+            "summary": processed_content["summary"]
+        }
+
+    @classmethod
+    async def stream_document(
+        cls,
+        filename: str,
+        source: DocumentSource,
+        custom_prompt: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Extract text from a document and stream the generated blog post
+        
+        Yields (event, data) pairs: "status" updates for each stage, then the
+        events produced by AIService.stream_content.
+        """
+        yield "status", {"stage": "extracting"}
+        extracted = await cls.extract_text(source, filename)
+        logger.debug(f"Extracted content length: {len(extracted.text)}")
+        
+        yield "status", {"stage": "generating", "truncated": extracted.truncated}
+        async for event in AIService.stream_content(extracted.text, custom_prompt):
+            yield event
+
+    @staticmethod
+    def discard_source(source: DocumentSource) -> None:
+        """Remove the spill file of a large upload, if there is one"""
+        if isinstance(source, Path):
+            try:
+                os.unlink(source)
+                logger.debug("Temporary file cleaned up")
+            except Exception as e:
+                logger.error(f"Error cleaning up temporary file: {str(e)}")
+
     @classmethod
     async def process_file(cls, file: UploadFile, custom_prompt: Optional[str] = None) -> Dict[str, str]:
         """
@@ -92,32 +222,8 @@ class FileProcessor:
         logger.debug(f"Processing file: {file.filename}")
         cls.validate_file_extension(file.filename)
         
-        temp_file = await cls.save_upload_file_tmp(file)
+        source = await cls.read_upload(file)
         try:
-            # Extract text from the file
-            logger.debug("Extracting text from file")
-            if file.filename.lower().endswith('.docx'):
-                content = cls.extract_text_from_docx(temp_file)
-            else:  # PDF
-                content = cls.extract_text_from_pdf(temp_file)
-            
-            logger.debug(f"Extracted content length: {len(content)}")
-            
-            # Process content with GPT-4
-            logger.debug("Processing content with GPT-4")
-            processed_content = await AIService.process_content(content, custom_prompt)
-            
-            return {
-                "filename": file.filename,
-                "content": processed_content["content"],
-                "title": processed_content["title"],
-                "keywords": processed_content["keywords"],
-                "summary": processed_content["summary"]
-            }
+            return await cls.process_document(file.filename, source, custom_prompt)
         finally:
-            # Clean up temporary file
-            try:
-                os.unlink(temp_file)
-                logger.debug("Temporary file cleaned up")
-            except Exception as e:
-                logger.error(f"Error cleaning up temporary file: {str(e)}") 
\ No newline at end of file
+            cls.discard_source(source)
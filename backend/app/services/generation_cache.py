@@ -0,0 +1,226 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.models.generation_cache import GenerationCacheEntry
+
+logger = logging.getLogger(__name__)
+
+# Fields of an AIService.process_content result that are worth caching
+CACHED_FIELDS = ("title", "content", "keywords", "summary")
+
+def make_cache_key(content: str, prompt_template: str, model_name: str) -> str:
+    """
+    Build a content-addressed cache key.
+
+    The key covers everything that determines the generated post: the
+    extracted document text, the (unformatted) prompt template and the model.
+    """
+    digest = hashlib.sha256()
+    for part in (model_name, prompt_template, content):
+        encoded = part.encode("utf-8")
+        # Length-prefix each part so different splits never collide
+        digest.update(len(encoded).to_bytes(8, "big"))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+class GenerationCache(ABC):
+    """
+    Base class for generation cache backends, tracking hit/miss counters
+
+    Counters can be updated from worker threads (the database backend runs
+    its queries in asyncio.to_thread), so every update takes _stats_lock.
+    """
+
+    backend_name = "base"
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._stats_lock = threading.Lock()
+
+    def _record_evictions(self, count: int) -> None:
+        with self._stats_lock:
+            self.evictions += count
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        result = await self._get(key)
+        with self._stats_lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return result
+
+    async def set(self, key: str, model_name: str, result: Dict[str, Any]) -> None:
+        value = {field: result[field] for field in CACHED_FIELDS if field in result}
+        await self._set(key, model_name, value)
+
+    @abstractmethod
+    async def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached value for key, or None if missing or expired"""
+
+    @abstractmethod
+    async def _set(self, key: str, model_name: str, value: Dict[str, Any]) -> None:
+        """Store value under key, evicting entries beyond capacity"""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Drop every entry"""
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            hits, misses, evictions = self.hits, self.misses, self.evictions
+        lookups = hits + misses
+        return {
+            "backend": self.backend_name,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "evictions": evictions,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+class InMemoryGenerationCache(GenerationCache):
+    """Per-process LRU cache with a TTL on each entry"""
+
+    backend_name = "memory"
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        super().__init__(max_entries, ttl_seconds)
+        self._entries: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    async def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self._record_evictions(1)
+            return None
+        self._entries.move_to_end(key)
+        return dict(value)
+
+    async def _set(self, key: str, model_name: str, value: Dict[str, Any]) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._record_evictions(1)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["entries"] = len(self._entries)
+        return stats
+
+class DatabaseGenerationCache(GenerationCache):
+    """
+    Cache stored in the generation_cache table so every worker shares hits.
+
+    Hit/miss counters are per process. Database work runs in a thread so the
+    event loop is not blocked.
+    """
+
+    backend_name = "database"
+
+    def __init__(self, session_factory: Callable[[], Session], max_entries: int, ttl_seconds: int):
+        super().__init__(max_entries, ttl_seconds)
+        self.session_factory = session_factory
+
+    def _get_sync(self, key: str) -> Optional[Dict[str, Any]]:
+        now = datetime.utcnow()
+        with self.session_factory() as db:
+            entry = db.get(GenerationCacheEntry, key)
+            if entry is None:
+                return None
+            if entry.expires_at <= now:
+                db.delete(entry)
+                db.commit()
+                self._record_evictions(1)
+                return None
+            entry.last_accessed_at = now
+            result = dict(entry.result)
+            db.commit()
+            return result
+
+    def _set_sync(self, key: str, model_name: str, value: Dict[str, Any]) -> None:
+        now = datetime.utcnow()
+        with self.session_factory() as db:
+            db.merge(GenerationCacheEntry(
+                key=key,
+                model_name=model_name,
+                result=value,
+                created_at=now,
+                expires_at=now + timedelta(seconds=self.ttl_seconds),
+                last_accessed_at=now
+            ))
+            db.flush()
+
+            # Drop expired entries, then the least recently used beyond capacity
+            evicted = db.query(GenerationCacheEntry).filter(
+                GenerationCacheEntry.expires_at <= now
+            ).delete(synchronize_session=False)
+            stale_keys = db.query(GenerationCacheEntry.key).order_by(
+                GenerationCacheEntry.last_accessed_at.desc()
+            ).offset(self.max_entries).subquery()
+            evicted += db.query(GenerationCacheEntry).filter(
+                GenerationCacheEntry.key.in_(stale_keys.select())
+            ).delete(synchronize_session=False)
+            db.commit()
+            self._record_evictions(evicted)
+
+    async def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._get_sync, key)
+
+    async def _set(self, key: str, model_name: str, value: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self._set_sync, key, model_name, value)
+
+    async def clear(self) -> None:
+        def _clear() -> None:
+            with self.session_factory() as db:
+                db.query(GenerationCacheEntry).delete(synchronize_session=False)
+                db.commit()
+        await asyncio.to_thread(_clear)
+
+_cache: Optional[GenerationCache] = None
+
+def get_generation_cache() -> Optional[GenerationCache]:
+    """Return the configured generation cache, or None when caching is disabled"""
+    global _cache
+    if _cache is None:
+        backend = settings.GENERATION_CACHE_BACKEND.lower()
+        if backend == "none":
+            return None
+        if backend == "database":
+            _cache = DatabaseGenerationCache(
+                SessionLocal,
+                settings.GENERATION_CACHE_MAX_ENTRIES,
+                settings.GENERATION_CACHE_TTL_SECONDS
+            )
+        elif backend == "memory":
+            _cache = InMemoryGenerationCache(
+                settings.GENERATION_CACHE_MAX_ENTRIES,
+                settings.GENERATION_CACHE_TTL_SECONDS
+            )
+        else:
+            raise ValueError(f"Unknown generation cache backend: {settings.GENERATION_CACHE_BACKEND}")
+        logger.info(f"Using {_cache.backend_name} generation cache")
+    return _cache
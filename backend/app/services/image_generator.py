@@ -1,5 +1,7 @@
-import openai
-from app.core.config import settings
+from app.services.image_store import StoredImage, get_image_store, make_image_key
+from app.services.openai_client import create_chat_completion, create_image
+from fastapi import HTTPException
+import base64
 import logging
 
 logger = logging.getLogger(__name__)
@@ -35,8 +37,7 @@ class ImageGenerator:
             Format the response as just the prompt text, nothing else."""
             
             # Call GPT-4O Mini to generate the image prompt
-            client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-            response = await client.chat.completions.create(
+            response = await create_chat_completion(
                 model="gpt-4o-mini",  # Using GPT-4O Mini model
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -51,45 +52,59 @@ class ImageGenerator:
             
             return prompt
             
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error generating image prompt: {str(e)}")
             raise Exception(f"Failed to generate image prompt: {str(e)}")
 
     @staticmethod
-    async def generate_image(content: str, title: str) -> str:
+    async def generate_image(content: str, title: str, regenerate: bool = False) -> StoredImage:
         """
         Generate an image using DALL-E 3 with a GPT-4O Mini generated prompt
         
+        The image is returned inline and kept in the local image store, since
+        the OpenAI-hosted URL expires. A post with the same title and content
+        reuses the stored image instead of paying for another generation,
+        unless regenerate asks for a new one.
+        
         Args:
             content: The blog post content
             title: The blog post title
+            regenerate: Generate a new image even if one is stored for this post,
+                and reuse the new one from then on
             
         Returns:
-            The URL of the generated image
+            The stored image
         """
-        try:
+        async def create():
             # First, generate a prompt using GPT-4O Mini
             prompt = await ImageGenerator.generate_image_prompt(content, title)
             
             logger.debug(f"Generating image with DALL-E 3 using prompt: {prompt}+Make sure the spelling of any word in the image is correct")
             
             # Call DALL-E 3
-            client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-            response = await client.images.generate(
+            response = await create_image(
                 model="dall-e-3",
                 prompt=prompt,
                 size="1024x1024",
                 quality="hd",
                 n=1,
-                style="natural"
+                style="natural",
+                response_format="b64_json"
             )
             
-            # Get the image URL
-            image_url = response.data[0].url
-            logger.debug(f"Generated image URL: {image_url}")
-            
-            return image_url
+            # DALL-E returns PNG images
+            return base64.b64decode(response.data[0].b64_json), "image/png"
+        
+        try:
+            key = make_image_key("dall-e-3", "1024x1024", "hd", title, content)
+            image = await get_image_store().get_or_create(key, create, refresh=regenerate)
+            logger.debug(f"Generated image stored as: {image.name}")
+            return image
             
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error generating image: {str(e)}")
-            raise Exception(f"Failed to generate image: {str(e)}") 
\ No newline at end of file
+            raise Exception(f"Failed to generate image: {str(e)}") 
@@ -0,0 +1,226 @@
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import re
+import tempfile
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+IMAGE_EXTENSIONS = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/gif": "gif",
+    "image/webp": "webp",
+}
+CONTENT_TYPES = {extension: content_type for content_type, extension in IMAGE_EXTENSIONS.items()}
+
+# Stored images are named by the SHA-256 of their bytes
+IMAGE_NAME_PATTERN = re.compile(r"^[0-9a-f]{64}\.(png|jpg|gif|webp)$")
+
+class StoredImage(NamedTuple):
+    name: str
+    path: Path
+    content_type: str
+
+def make_image_key(*parts: str) -> str:
+    """Hash the inputs that determine a generated image into a lookup key"""
+    digest = hashlib.sha256()
+    for part in parts:
+        encoded = part.encode("utf-8")
+        digest.update(len(encoded).to_bytes(8, "big"))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+def transcode(data: bytes, content_type: str, max_dimension: Optional[int], webp: bool, quality: int) -> Tuple[bytes, str]:
+    """
+    Resize and/or re-encode an image as WebP with Pillow.
+
+    Returns the input unchanged when Pillow is missing or nothing is asked for.
+    """
+    if not PIL_AVAILABLE or (not max_dimension and not webp):
+        return data, content_type
+    with Image.open(io.BytesIO(data)) as image:
+        resized = bool(max_dimension) and max(image.size) > max_dimension
+        if not resized and not webp:
+            return data, content_type
+        if resized:
+            image.thumbnail((max_dimension, max_dimension))
+        output = io.BytesIO()
+        if webp:
+            image.save(output, format="WEBP", quality=quality, method=4)
+            return output.getvalue(), "image/webp"
+        image.save(output, format=image.format or "PNG")
+        return output.getvalue(), content_type
+
+class ImageStore:
+    """
+    Content-addressed store for generated images on local disk.
+
+    Images live under <root>/<first two hex digits>/<sha256>.<ext>. Writing
+    the same bytes twice is a no-op. Lookup keys (hashes of the generation
+    inputs) map to image names under <root>/keys, so the same request is
+    never sent to the image model twice. Once the store grows past max_bytes,
+    the least recently used images are deleted.
+    """
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    def _image_path(self, name: str) -> Path:
+        return self.root / name[:2] / name
+
+    def _key_path(self, key: str) -> Path:
+        return self.root / "keys" / key
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    def get(self, name: str) -> Optional[StoredImage]:
+        """Return a stored image by name, marking it as recently used"""
+        if not IMAGE_NAME_PATTERN.match(name):
+            return None
+        path = self._image_path(name)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return StoredImage(name, path, CONTENT_TYPES[name.rsplit(".", 1)[1]])
+
+    def put(self, data: bytes, content_type: str) -> StoredImage:
+        """Store image bytes (resized/transcoded per settings) and return where they live"""
+        data, content_type = transcode(
+            data,
+            content_type,
+            settings.IMAGE_STORE_MAX_DIMENSION,
+            settings.IMAGE_STORE_WEBP,
+            settings.IMAGE_STORE_WEBP_QUALITY
+        )
+        name = f"{hashlib.sha256(data).hexdigest()}.{IMAGE_EXTENSIONS.get(content_type, 'png')}"
+        path = self._image_path(name)
+        if path.exists():
+            os.utime(path)
+        else:
+            self._write_atomic(path, data)
+            self.evict()
+        return StoredImage(name, path, content_type)
+
+    def lookup(self, key: str) -> Optional[StoredImage]:
+        """Return the image previously stored for a lookup key, if it is still on disk"""
+        key_path = self._key_path(key)
+        try:
+            name = key_path.read_text().strip()
+        except FileNotFoundError:
+            return None
+        image = self.get(name)
+        if image is None:
+            # The image was evicted; forget the key so it is generated again
+            key_path.unlink(missing_ok=True)
+        return image
+
+    def remember(self, key: str, image: StoredImage) -> None:
+        self._write_atomic(self._key_path(key), image.name.encode("utf-8"))
+
+    def evict(self) -> int:
+        """Delete least recently used images until the store fits in max_bytes"""
+        images = []
+        total = 0
+        for path in self.root.glob("??/*"):
+            if not IMAGE_NAME_PATTERN.match(path.name):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            images.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        evicted = 0
+        for _, size, path in sorted(images):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            evicted += 1
+        if evicted:
+            logger.info(f"Evicted {evicted} images from the image store")
+        return evicted
+
+    async def get_or_create(self, key: str, create, refresh: bool = False) -> StoredImage:
+        """
+        Return the image stored for key, or await create() -> (bytes, content type)
+        and store its result.
+
+        With refresh, the stored image is ignored and key is pointed at the
+        newly created one. Concurrent calls for the same key share a single
+        create() call.
+        """
+        if not refresh:
+            image = await asyncio.to_thread(self.lookup, key)
+            if image is not None:
+                logger.debug(f"Image store hit for key {key}")
+                return image
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            return await asyncio.shield(in_flight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            data, content_type = await create()
+            image = await asyncio.to_thread(self.put, data, content_type)
+            await asyncio.to_thread(self.remember, key, image)
+            future.set_result(image)
+            return image
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+
+    def resolve_url(self, url: Optional[str]) -> Optional[StoredImage]:
+        """Map a URL served by the image file endpoint back to the stored image"""
+        if not url:
+            return None
+        path = urlsplit(url).path
+        prefix = f"{settings.API_V1_STR}/images/files/"
+        if not path.startswith(prefix):
+            return None
+        return self.get(path[len(prefix):])
+
+_store: Optional[ImageStore] = None
+
+def get_image_store() -> ImageStore:
+    global _store
+    if _store is None:
+        _store = ImageStore(Path(settings.IMAGE_STORE_DIR), settings.IMAGE_STORE_MAX_BYTES)
+    return _store
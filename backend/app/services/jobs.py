@@ -0,0 +1,193 @@
+from datetime import datetime, timedelta
+from typing import List, Optional
+import asyncio
+import logging
+import traceback
+import uuid
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session, undefer
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.models.job import GenerationJob
+from app.services.file_processor import FileProcessor
+from app.services.rate_limit import queue_timeout
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {"succeeded", "failed"}
+
+class JobService:
+    @staticmethod
+    def enqueue(
+        db: Session,
+        user_id: int,
+        filename: str,
+        file_data: bytes,
+        custom_prompt: Optional[str] = None
+    ) -> GenerationJob:
+        """Store an uploaded document as a queued generation job"""
+        job = GenerationJob(
+            id=uuid.uuid4().hex,
+            user_id=user_id,
+            status="queued",
+            filename=filename,
+            custom_prompt=custom_prompt,
+            file_data=file_data,
+            attempts=0
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    @staticmethod
+    def get_job(db: Session, job_id: str, user_id: int) -> Optional[GenerationJob]:
+        """Get a job by ID"""
+        return db.query(GenerationJob).filter(
+            GenerationJob.id == job_id,
+            GenerationJob.user_id == user_id
+        ).first()
+
+    @staticmethod
+    def claim_next(db: Session) -> Optional[GenerationJob]:
+        """
+        Lease the oldest runnable job.
+
+        A job is runnable when it is queued, or when it is still marked as
+        running but its lease has expired because the worker holding it died.
+        SKIP LOCKED lets several workers claim jobs without blocking each other.
+        """
+        now = datetime.utcnow()
+        job = db.query(GenerationJob).options(undefer(GenerationJob.file_data)).filter(
+            or_(
+                GenerationJob.status == "queued",
+                (GenerationJob.status == "running") & (GenerationJob.locked_until < now)
+            )
+        ).order_by(GenerationJob.created_at).with_for_update(skip_locked=True).first()
+
+        if job is None:
+            db.rollback()
+            return None
+
+        job.attempts = (job.attempts or 0) + 1
+        if job.attempts > settings.JOB_MAX_ATTEMPTS:
+            job.status = "failed"
+            job.error = "Job exceeded the maximum number of attempts"
+            job.file_data = None
+            job.finished_at = now
+            db.commit()
+            return None
+
+        job.status = "running"
+        job.started_at = now
+        job.locked_until = now + timedelta(seconds=settings.JOB_LEASE_SECONDS)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    @staticmethod
+    def complete(db: Session, job_id: str, result: dict) -> None:
+        job = db.get(GenerationJob, job_id)
+        job.status = "succeeded"
+        job.result = result
+        job.error = None
+        job.file_data = None
+        job.locked_until = None
+        job.finished_at = datetime.utcnow()
+        db.commit()
+
+    @staticmethod
+    def fail(db: Session, job_id: str, error: str) -> None:
+        job = db.get(GenerationJob, job_id)
+        job.status = "failed"
+        job.error = error
+        job.file_data = None
+        job.locked_until = None
+        job.finished_at = datetime.utcnow()
+        db.commit()
+
+    @staticmethod
+    def requeue(db: Session, job_id: str) -> None:
+        """Hand a job back to the queue, e.g. when its worker shuts down"""
+        job = db.get(GenerationJob, job_id)
+        if job is not None and job.status == "running":
+            job.status = "queued"
+            job.locked_until = None
+            db.commit()
+
+def _with_session(func, *args):
+    with SessionLocal() as db:
+        return func(db, *args)
+
+class JobWorkerPool:
+    """
+    In-process workers that run queued generation jobs.
+
+    Every application process runs its own workers; they coordinate through
+    row locks on the jobs table, so jobs survive restarts and are processed
+    exactly once per successful attempt.
+    """
+
+    def __init__(self, workers: int, poll_interval: float):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        for index in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._run(index), name=f"job-worker-{index}"))
+        logger.info(f"Started {self.workers} generation job workers")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self, index: int) -> None:
+        # Jobs wait as long as it takes for an OpenAI call slot
+        queue_timeout.set(None)
+        while True:
+            try:
+                job = await asyncio.to_thread(_with_session, JobService.claim_next)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job worker {index} could not claim a job: {str(e)}")
+                job = None
+            if job is None:
+                await asyncio.sleep(self.poll_interval)
+                continue
+            await self._process(job)
+
+    async def _process(self, job: GenerationJob) -> None:
+        logger.info(f"Processing generation job {job.id} ({job.filename}), attempt {job.attempts}")
+        try:
+            result = await FileProcessor.process_document(job.filename, job.file_data, job.custom_prompt)
+        except asyncio.CancelledError:
+            await asyncio.shield(asyncio.to_thread(_with_session, JobService.requeue, job.id))
+            raise
+        except Exception as e:
+            detail = getattr(e, "detail", None) or str(e)
+            logger.error(f"Generation job {job.id} failed: {detail}")
+            logger.debug(traceback.format_exc())
+            await asyncio.to_thread(_with_session, JobService.fail, job.id, detail)
+            return
+        await asyncio.to_thread(_with_session, JobService.complete, job.id, result)
+        logger.info(f"Generation job {job.id} succeeded")
+
+_pool: Optional[JobWorkerPool] = None
+
+def start_job_workers() -> None:
+    global _pool
+    if settings.JOB_WORKERS > 0 and _pool is None:
+        _pool = JobWorkerPool(settings.JOB_WORKERS, settings.JOB_POLL_INTERVAL_SECONDS)
+        _pool.start()
+
+async def stop_job_workers() -> None:
+    global _pool
+    if _pool is not None:
+        await _pool.stop()
+        _pool = None
@@ -0,0 +1,58 @@
+from typing import Any, Optional
+import httpx
+import openai
+from app.core.config import settings
+from app.services.rate_limit import ConcurrencyLimiter
+import logging
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[openai.AsyncOpenAI] = None
+
+# Global caps on in-flight calls, so a burst cannot use up the account's
+# OpenAI rate limits or pile latency onto everyone else's requests
+chat_slots = ConcurrencyLimiter("OpenAI chat", settings.OPENAI_MAX_CONCURRENT_CHAT)
+image_slots = ConcurrencyLimiter("OpenAI image", settings.OPENAI_MAX_CONCURRENT_IMAGES)
+
+def get_openai_client() -> openai.AsyncOpenAI:
+    """
+    Return the process-wide AsyncOpenAI client.
+
+    The client is created lazily on first use and reused for every request so
+    that the underlying connection pool (and its keep-alive TLS connections)
+    is shared instead of being rebuilt per call.
+    """
+    global _client
+    if _client is None:
+        logger.debug("Creating shared AsyncOpenAI client")
+        http_client = openai.DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+        )
+        _client = openai.AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            http_client=http_client,
+            timeout=settings.OPENAI_TIMEOUT_SECONDS,
+            max_retries=settings.OPENAI_MAX_RETRIES,
+        )
+    return _client
+
+async def close_openai_client() -> None:
+    """Close the shared client and release its pooled connections"""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+        logger.debug("Closed shared AsyncOpenAI client")
+
+async def create_chat_completion(**kwargs: Any) -> Any:
+    """Create a (non-streaming) chat completion once a chat slot is free"""
+    async with chat_slots.slot():
+        return await get_openai_client().chat.completions.create(**kwargs)
+
+async def create_image(**kwargs: Any) -> Any:
+    """Call the images API once an image slot is free"""
+    async with image_slots.slot():
+        return await get_openai_client().images.generate(**kwargs)
@@ -0,0 +1,193 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, Optional, Tuple
+import asyncio
+import logging
+import math
+import time
+
+from fastapi import Depends, HTTPException
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.auth import get_current_user
+from app.core.config import settings
+from app.db.base import AsyncSessionLocal
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# How long OpenAI calls made in the current context may queue for a free
+# slot. Background jobs set None: nobody is waiting on them, so they queue
+# for as long as it takes instead of failing.
+queue_timeout: ContextVar[Optional[float]] = ContextVar(
+    "queue_timeout", default=settings.OPENAI_QUEUE_TIMEOUT_SECONDS
+)
+
+class ConcurrencyLimiter:
+    """
+    Caps how many calls of one kind are in flight in this process
+
+    Callers beyond the cap wait in FIFO order for up to queue_timeout
+    seconds, then get a 503 whose Retry-After is the recent average call
+    duration.
+    """
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self.in_flight = 0
+        self._semaphore = asyncio.Semaphore(limit)
+        # Moving average of how long a slot is held, in seconds
+        self._average_seconds = 5.0
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), queue_timeout.get())
+        except asyncio.TimeoutError:
+            logger.warning(f"{self.name} queue timed out with {self.in_flight} calls in flight")
+            raise HTTPException(
+                status_code=503,
+                detail=f"Too many {self.name} requests in progress, please retry shortly",
+                headers={"Retry-After": str(math.ceil(self._average_seconds))}
+            )
+
+        self.in_flight += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+            self._average_seconds = 0.8 * self._average_seconds + 0.2 * (time.monotonic() - started)
+
+class RateLimiter(ABC):
+    """
+    Base class for token-bucket rate limiter backends
+
+    Each key has a bucket holding up to burst tokens that refills at rate
+    tokens per second; a request is admitted if it can take a whole token.
+    """
+
+    backend_name = "base"
+
+    @abstractmethod
+    async def acquire(self, key: str, rate: float, burst: int) -> Optional[float]:
+        """
+        Take a token from key's bucket
+
+        Returns:
+            None if the request is admitted, otherwise the seconds until a
+            token will be available
+        """
+
+class InMemoryRateLimiter(RateLimiter):
+    """Buckets in this process only; the least recently used are dropped past max_keys"""
+
+    backend_name = "memory"
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def acquire(self, key: str, rate: float, burst: int) -> Optional[float]:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        admitted = tokens >= 1
+        if admitted:
+            tokens -= 1
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return None if admitted else (1 - tokens) / rate
+
+# Refill and take a token in one statement, so concurrent workers never
+# both spend the last token. No row comes back when the bucket is empty.
+TAKE_TOKEN_QUERY = text("""
+    INSERT INTO rate_limit_buckets AS bucket (key, tokens, updated_at)
+    VALUES (:key, CAST(:burst AS double precision) - 1, clock_timestamp())
+    ON CONFLICT (key) DO UPDATE SET
+        tokens = LEAST(
+            CAST(:burst AS double precision),
+            bucket.tokens + EXTRACT(EPOCH FROM clock_timestamp() - bucket.updated_at)::double precision * :rate
+        ) - 1,
+        updated_at = clock_timestamp()
+    WHERE LEAST(
+        CAST(:burst AS double precision),
+        bucket.tokens + EXTRACT(EPOCH FROM clock_timestamp() - bucket.updated_at)::double precision * :rate
+    ) >= 1
+    RETURNING bucket.tokens
+""")
+
+TOKEN_WAIT_QUERY = text("""
+    SELECT (1 - LEAST(
+        CAST(:burst AS double precision),
+        tokens + EXTRACT(EPOCH FROM clock_timestamp() - updated_at)::double precision * :rate
+    )) / :rate
+    FROM rate_limit_buckets
+    WHERE key = :key
+""")
+
+class DatabaseRateLimiter(RateLimiter):
+    """
+    Buckets in the rate_limit_buckets table, shared by every worker (Postgres only)
+    """
+
+    backend_name = "database"
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]):
+        self.session_factory = session_factory
+
+    async def acquire(self, key: str, rate: float, burst: int) -> Optional[float]:
+        params = {"key": key, "rate": float(rate), "burst": burst}
+        async with self.session_factory() as db:
+            admitted = (await db.execute(TAKE_TOKEN_QUERY, params)).first()
+            if admitted is not None:
+                await db.commit()
+                return None
+            wait = (await db.execute(TOKEN_WAIT_QUERY, params)).scalar()
+            await db.rollback()
+        return max(wait or 0.0, 0.0)
+
+_limiter: Optional[RateLimiter] = None
+
+def get_rate_limiter() -> Optional[RateLimiter]:
+    """Return the configured rate limiter, or None when rate limiting is disabled"""
+    global _limiter
+    if _limiter is None:
+        backend = settings.RATE_LIMIT_BACKEND.lower()
+        if backend == "none":
+            return None
+        if backend == "database":
+            _limiter = DatabaseRateLimiter(AsyncSessionLocal)
+        elif backend == "memory":
+            _limiter = InMemoryRateLimiter(settings.RATE_LIMIT_MAX_KEYS)
+        else:
+            raise ValueError(f"Unknown rate limit backend: {settings.RATE_LIMIT_BACKEND}")
+        logger.info(f"Using {_limiter.backend_name} rate limiter")
+    return _limiter
+
+def rate_limit(endpoint: str, per_minute: float, burst: int) -> Callable:
+    """
+    Dependency that admits a user's request to endpoint through a token bucket
+
+    Rejected requests get a 429 whose Retry-After is the wait for the next token.
+    """
+    async def dependency(current_user: User = Depends(get_current_user)) -> None:
+        limiter = get_rate_limiter()
+        if limiter is None:
+            return
+        wait = await limiter.acquire(f"{endpoint}:{current_user.id}", per_minute / 60, burst)
+        if wait is not None:
+            logger.info(f"Rate limited user {current_user.id} on {endpoint} for {wait:.1f}s")
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests, please slow down",
+                headers={"Retry-After": str(max(1, math.ceil(wait)))}
+            )
+    return dependency
@@ -0,0 +1,113 @@
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+import re
+
+from sqlalchemy import JSON, DateTime, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+# Result types for the columns the drivers would otherwise return raw
+RESULT_TYPES = {"keywords": JSON, "created_at": DateTime, "updated_at": DateTime}
+
+# Ranked matches are found first, then snippets are built for just that page
+POSTGRES_SEARCH_QUERY = text("""
+    WITH query AS (SELECT websearch_to_tsquery('english', :q) AS q),
+    ranked AS (
+        SELECT blog_posts.id, ts_rank_cd(search_vector, query.q) AS rank
+        FROM blog_posts, query
+        WHERE blog_posts.user_id = :user_id AND blog_posts.search_vector @@ query.q
+        ORDER BY rank DESC, blog_posts.id DESC
+        LIMIT :limit OFFSET :offset
+    )
+    SELECT p.id, p.user_id, p.title, p.summary, p.keywords, p.image_url, p.status,
+           p.wordpress_post_id, p.version, p.created_at, p.updated_at, ranked.rank,
+           ts_headline(
+               'english',
+               coalesce(p.summary, '') || ' ' || regexp_replace(coalesce(p.content, ''), '<[^>]+>', ' ', 'g'),
+               query.q,
+               'StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, MaxFragments=2'
+           ) AS snippet
+    FROM ranked
+    JOIN blog_posts p ON p.id = ranked.id
+    CROSS JOIN query
+    ORDER BY ranked.rank DESC, p.id DESC
+""").columns(**RESULT_TYPES)
+
+# bm25() is lower-is-better, so it is negated to match the Postgres ordering.
+# Column weights follow the tsvector weights: title, summary, content, keywords.
+# Snippets always come from content (column 2), like the Postgres headline;
+# letting FTS5 pick a column could return a fragment of the keywords JSON.
+SQLITE_SEARCH_QUERY = text("""
+    SELECT p.id, p.user_id, p.title, p.summary, p.keywords, p.image_url, p.status,
+           p.wordpress_post_id, p.version, p.created_at, p.updated_at,
+           -bm25(blog_posts_fts, 10.0, 4.0, 1.0, 4.0) AS rank,
+           snippet(blog_posts_fts, 2, '<mark>', '</mark>', '…', 24) AS snippet
+    FROM blog_posts_fts
+    JOIN blog_posts p ON p.id = blog_posts_fts.rowid
+    WHERE blog_posts_fts MATCH :q AND p.user_id = :user_id
+    ORDER BY rank DESC, p.id DESC
+    LIMIT :limit OFFSET :offset
+""").columns(**RESULT_TYPES)
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+# Any HTML tag except the <mark> highlights added by the snippet functions
+_NON_MARK_TAG_RE = re.compile(r"<(?!/?mark>)[^>]*>?")
+
+def to_fts5_query(query: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 query that matches all of its words
+
+    Words are quoted so operators and punctuation in user input can never
+    cause a syntax error.
+    """
+    words = _WORD_RE.findall(query)
+    if not words:
+        return None
+    return " ".join(f'"{word}"' for word in words)
+
+class SearchService:
+    @staticmethod
+    async def search_posts(
+        db: AsyncSession,
+        user_id: int,
+        query: str,
+        limit: int = 20,
+        offset: int = 0
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        Full-text search over a user's posts, best matches first
+
+        Uses the tsvector index on Postgres and the FTS5 table on SQLite.
+
+        Returns:
+            The page of rows (with rank and a highlighted snippet) and the
+            offset of the next page (None on the last page)
+        """
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            statement, q = POSTGRES_SEARCH_QUERY, query
+        elif dialect == "sqlite":
+            statement, q = SQLITE_SEARCH_QUERY, to_fts5_query(query)
+            if q is None:
+                return [], None
+        else:
+            raise Exception(f"Full-text search is not supported on {dialect}")
+
+        result = await db.execute(statement, {
+            "q": q,
+            "user_id": user_id,
+            "limit": limit + 1,
+            "offset": offset,
+        })
+        rows = result.all()
+        next_offset = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_offset = offset + limit
+        # FTS5 snippets are cut from the raw HTML, so drop partial markup
+        items = [
+            {**row._mapping, "snippet": _NON_MARK_TAG_RE.sub("", row.snippet or "").strip()}
+            for row in rows
+        ]
+        return items, next_offset
@@ -0,0 +1,187 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Iterator, List, NamedTuple, Optional, Tuple, Union
+import asyncio
+import io
+import logging
+
+import docx
+from PyPDF2 import PdfReader
+
+logger = logging.getLogger(__name__)
+
+class ExtractionError(Exception):
+    """Raised when a document could not be extracted within the pool limits"""
+
+# A document is either held in memory or, if it was too large, spilled to disk
+DocumentSource = Union[bytes, Path]
+
+# Rough characters-per-token ratio used to turn a token budget into characters
+CHARS_PER_TOKEN = 4
+
+class ExtractedText(NamedTuple):
+    """Text extracted from a document plus where extraction stopped"""
+    text: str
+    # Total pages in the document (PDF only)
+    page_count: Optional[int]
+    # Pages (PDF) or paragraphs (Word) that contributed text
+    parts_read: int
+    # 1-based page/paragraph at which the budget was reached, if it was
+    truncated_at: Optional[int]
+
+    @property
+    def truncated(self) -> bool:
+        return self.truncated_at is not None
+
+def char_budget(max_chars: Optional[int], max_tokens: Optional[int]) -> Optional[int]:
+    """Combine a character and an (approximate) token budget into one character limit"""
+    limits = [limit for limit in (max_chars, max_tokens * CHARS_PER_TOKEN if max_tokens else None) if limit]
+    return min(limits) if limits else None
+
+def _clip(text: str, remaining: int) -> str:
+    """Cut text to at most remaining characters, preferring a word boundary"""
+    clipped = text[:remaining]
+    boundary = clipped.rfind(" ")
+    return clipped[:boundary] if boundary > remaining // 2 else clipped
+
+def _collect(parts: Iterator[Tuple[int, str]], max_chars: Optional[int]) -> Tuple[List[str], int, Optional[int]]:
+    """Accumulate (index, text) parts until the character budget is spent"""
+    collected: List[str] = []
+    used = 0
+    for index, text in parts:
+        if max_chars is not None and used + len(text) > max_chars:
+            remainder = _clip(text, max_chars - used)
+            if remainder:
+                collected.append(remainder)
+            return collected, len(collected), index
+        collected.append(text)
+        # Account for the separator added when joining
+        used += len(text) + 2
+    return collected, len(collected), None
+
+def _open_source(source: DocumentSource) -> Union[BinaryIO, Path]:
+    """Wrap in-memory documents in a stream the parsers can read"""
+    return io.BytesIO(source) if isinstance(source, bytes) else source
+
+def iter_docx_paragraphs(source: DocumentSource) -> Iterator[Tuple[int, str]]:
+    """Yield (paragraph number, text) for each non-empty paragraph of a Word document"""
+    doc = docx.Document(_open_source(source))
+    for number, para in enumerate(doc.paragraphs, start=1):
+        if para.text.strip():
+            yield number, para.text
+
+def iter_pdf_pages(reader: PdfReader) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (page number, text) page by page, skipping pages without text.
+
+    Pages are parsed lazily, so a consumer that stops early never pays for
+    the remaining pages.
+    """
+    for number, page in enumerate(reader.pages, start=1):
+        text = page.extract_text() or ""
+        if text.strip():
+            yield number, text
+
+def extract_docx_text(source: DocumentSource, max_chars: Optional[int] = None) -> ExtractedText:
+    """Extract text from a Word document, stopping once max_chars is reached"""
+    collected, parts_read, truncated_at = _collect(iter_docx_paragraphs(source), max_chars)
+    return ExtractedText('\n\n'.join(collected), None, parts_read, truncated_at)
+
+def extract_pdf_text(source: DocumentSource, max_chars: Optional[int] = None) -> ExtractedText:
+    """Extract text from a PDF document, stopping once max_chars is reached"""
+    reader = PdfReader(_open_source(source))
+    collected, parts_read, truncated_at = _collect(iter_pdf_pages(reader), max_chars)
+    return ExtractedText('\n\n'.join(collected), len(reader.pages), parts_read, truncated_at)
+
+def _init_worker(max_memory_mb: int) -> None:
+    """Cap the address space of an extraction worker process"""
+    if max_memory_mb <= 0:
+        return
+    try:
+        import resource
+        limit = max_memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError) as e:
+        # Not available on every platform; run without the cap
+        logger.warning(f"Could not set extraction worker memory limit: {str(e)}")
+
+class ExtractionPool:
+    """
+    Bounded process pool for CPU-bound document parsing.
+
+    Parsing runs outside the event loop's process so a large judgment cannot
+    stall other requests. A document that exceeds the timeout has its pool
+    torn down (the only way to stop a running worker); other extractions
+    running in that pool at the same moment fail and can be retried.
+    """
+
+    def __init__(self, max_workers: int, timeout: float, max_memory_mb: int):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_memory_mb = max_memory_mb
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            logger.debug(f"Starting extraction pool with {self.max_workers} workers")
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=(self.max_memory_mb,)
+            )
+        return self._executor
+
+    def _terminate(self) -> None:
+        """Kill the worker processes and drop the pool so the next call starts a fresh one"""
+        executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        for process in list(getattr(executor, "_processes", {}).values()):
+            process.terminate()
+        # Don't wait: this runs on the event loop, and the executor's
+        # management thread reaps the killed workers in the background
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run func(*args) in a worker process, enforcing the per-document timeout"""
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._get_executor(), func, *args)
+        try:
+            return await asyncio.wait_for(future, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Extraction exceeded {self.timeout}s, restarting extraction pool")
+            self._terminate()
+            raise ExtractionError(f"Document took longer than {self.timeout:g} seconds to process")
+        except MemoryError:
+            raise ExtractionError(f"Document needs more than {self.max_memory_mb} MB to process")
+        except BrokenProcessPool:
+            logger.error("Extraction worker died, restarting extraction pool")
+            self._terminate()
+            raise ExtractionError("Document processing worker crashed (likely out of memory)")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+_pool: Optional[ExtractionPool] = None
+
+def get_extraction_pool() -> ExtractionPool:
+    """Return the process-wide extraction pool, created on first use"""
+    global _pool
+    if _pool is None:
+        # Imported here so spawned worker processes don't need app settings
+        from app.core.config import settings
+        _pool = ExtractionPool(
+            max_workers=settings.EXTRACTION_WORKERS,
+            timeout=settings.EXTRACTION_TIMEOUT_SECONDS,
+            max_memory_mb=settings.EXTRACTION_MAX_MEMORY_MB
+        )
+    return _pool
+
+def shutdown_extraction_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
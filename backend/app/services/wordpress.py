@@ -1,12 +1,226 @@
 import httpx
-from urllib.parse import urljoin
+from collections import OrderedDict
+from urllib.parse import urljoin, urlsplit
+from datetime import datetime
+import asyncio
 import logging
-from typing import Optional
+import mimetypes
+import os
+import random
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Set, Tuple
+from app.core.config import settings
 from app.models.user import User
+from app.services.image_store import get_image_store
 from httpx import TimeoutException, HTTPError
 
 logger = logging.getLogger(__name__)
 
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+class HTTPClientRegistry:
+    """
+    Long-lived AsyncClient instances keyed by origin (scheme, host, port).
+    
+    Reusing one client per WordPress site keeps TCP/TLS connections alive
+    between publishes instead of handshaking on every request. Idle
+    connections are dropped after WORDPRESS_KEEPALIVE_EXPIRY_SECONDS, and
+    only the max_origins most recently used sites keep a client and
+    semaphore; older clients are closed.
+    """
+    
+    def __init__(self, max_origins: int):
+        self.max_origins = max_origins
+        self._clients: "OrderedDict[str, httpx.AsyncClient]" = OrderedDict()
+        self._semaphores: "OrderedDict[str, asyncio.Semaphore]" = OrderedDict()
+        self._download_client: Optional[httpx.AsyncClient] = None
+        self._closing: Set[asyncio.Task] = set()
+    
+    @staticmethod
+    def origin(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+    
+    def get_client(self, url: str) -> httpx.AsyncClient:
+        """Return the shared client for the origin of url, creating it on first use"""
+        key = self.origin(url)
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            logger.debug(f"Creating HTTP client for {key} (HTTP/2: {HTTP2_AVAILABLE})")
+            client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=settings.WORDPRESS_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.WORDPRESS_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.WORDPRESS_KEEPALIVE_EXPIRY_SECONDS
+                ),
+                timeout=httpx.Timeout(30.0, connect=10.0)
+            )
+            self._clients[key] = client
+        self._clients.move_to_end(key)
+        while len(self._clients) > self.max_origins:
+            evicted_key, evicted = self._clients.popitem(last=False)
+            logger.debug(f"Closing least recently used HTTP client for {evicted_key}")
+            task = asyncio.get_running_loop().create_task(evicted.aclose())
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+        return client
+    
+    def get_download_client(self) -> httpx.AsyncClient:
+        """
+        Return the one client used to download images from other hosts
+        
+        Image URLs can point anywhere (the OpenAI CDN, blob stores), so they
+        share a single client whose pool is bounded in total instead of each
+        origin getting a client of its own that is never released.
+        """
+        if self._download_client is None or self._download_client.is_closed:
+            self._download_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.IMAGE_DOWNLOAD_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.IMAGE_DOWNLOAD_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.WORDPRESS_KEEPALIVE_EXPIRY_SECONDS
+                ),
+                timeout=httpx.Timeout(30.0, connect=10.0)
+            )
+        return self._download_client
+    
+    def get_semaphore(self, url: str) -> asyncio.Semaphore:
+        """Return the semaphore that bounds concurrent publishes to the origin of url"""
+        key = self.origin(url)
+        semaphore = self._semaphores.get(key)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(settings.WORDPRESS_PUBLISH_CONCURRENCY)
+            self._semaphores[key] = semaphore
+        self._semaphores.move_to_end(key)
+        while len(self._semaphores) > self.max_origins:
+            self._semaphores.popitem(last=False)
+        return semaphore
+    
+    async def aclose(self) -> None:
+        """Close every client; called on application shutdown"""
+        clients, self._clients = list(self._clients.values()), {}
+        if self._download_client is not None:
+            clients.append(self._download_client)
+            self._download_client = None
+        for client in clients:
+            await client.aclose()
+        await asyncio.gather(*self._closing, return_exceptions=True)
+
+wordpress_clients = HTTPClientRegistry(settings.WORDPRESS_MAX_CLIENTS)
+
+# Methods WordPress handles idempotently: repeating one has the same effect
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "PATCH", "DELETE"}
+
+# WordPress turned the request away without acting on it; safe to repeat for any method
+THROTTLED_STATUS_CODES = {429}
+
+# The request may or may not have been applied; only idempotent requests are repeated
+SERVER_ERROR_STATUS_CODES = {500, 502, 503, 504}
+
+# Failures before any bytes of the request were sent
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+# Failures after the request was sent, while waiting for the response
+READ_ERRORS = (httpx.ReadTimeout, httpx.ReadError, httpx.RemoteProtocolError)
+
+def retry_delay(attempt: int, response: Optional[httpx.Response] = None) -> float:
+    """Exponential backoff with jitter, honouring a numeric Retry-After header"""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), settings.WORDPRESS_RETRY_MAX_DELAY_SECONDS)
+    delay = settings.WORDPRESS_RETRY_BACKOFF_SECONDS * (2 ** attempt)
+    return min(delay, settings.WORDPRESS_RETRY_MAX_DELAY_SECONDS) * random.uniform(0.5, 1.0)
+
+async def with_retry(
+    send: Callable[[], Awaitable[httpx.Response]],
+    description: str,
+    *,
+    idempotent: bool
+) -> httpx.Response:
+    """
+    Call send(), retrying with exponential backoff while the failure shows
+    the request was not applied, or the request is safe to repeat.
+    
+    Every request is retried on 429 and on connection errors. Idempotent
+    requests are also retried on 5xx responses and read errors; anything
+    else (a POST that creates a post or media item) is not, since WordPress
+    may already have stored it. The last response (or error) is returned
+    (raised) once WORDPRESS_MAX_RETRIES retries have been used.
+    
+    send must build a fresh request on every call, so streamed bodies are
+    re-opened rather than replayed.
+    """
+    retryable_errors = CONNECT_ERRORS + READ_ERRORS if idempotent else CONNECT_ERRORS
+    retryable_statuses = (
+        THROTTLED_STATUS_CODES | SERVER_ERROR_STATUS_CODES if idempotent else THROTTLED_STATUS_CODES
+    )
+    for attempt in range(settings.WORDPRESS_MAX_RETRIES + 1):
+        is_last = attempt == settings.WORDPRESS_MAX_RETRIES
+        try:
+            response = await send()
+        except retryable_errors as e:
+            if is_last:
+                raise
+            delay = retry_delay(attempt)
+            logger.warning(f"{description} failed ({type(e).__name__}: {str(e)}), retrying in {delay:.1f}s")
+        else:
+            if response.status_code not in retryable_statuses or is_last:
+                return response
+            delay = retry_delay(attempt, response)
+            logger.warning(f"{description} returned {response.status_code}, retrying in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+async def send_with_retry(client: httpx.AsyncClient, method: str, url: str, **kwargs: Any) -> httpx.Response:
+    """Send a request with with_retry's backoff policy for its method"""
+    return await with_retry(
+        lambda: client.request(method, url, **kwargs),
+        f"{method} {url}",
+        idempotent=method.upper() in IDEMPOTENT_METHODS
+    )
+
+# Leading bytes of the image formats the generator and WordPress deal with
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+IMAGE_EXTENSIONS = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/gif": "gif",
+    "image/webp": "webp",
+}
+
+def detect_image_type(content_type: Optional[str], head: bytes) -> Tuple[str, str]:
+    """
+    Work out the content type and file extension of an image.
+    
+    The leading bytes win over the Content-Type header, since blob stores
+    frequently serve images as application/octet-stream.
+    
+    Returns:
+        (content type, file extension)
+    """
+    detected = None
+    for signature, mime in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            detected = mime
+            break
+    if detected is None and head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        detected = "image/webp"
+    if detected is None:
+        header_type = (content_type or "").split(";")[0].strip().lower()
+        detected = header_type if header_type.startswith("image/") else "image/jpeg"
+    extension = IMAGE_EXTENSIONS.get(detected) or (mimetypes.guess_extension(detected) or ".jpg").lstrip(".")
+    return detected, extension
+
 class WordPressService:
     @staticmethod
     async def publish_post(
@@ -14,7 +228,8 @@ class WordPressService:
         content: str,
         user: User,
         image_url: Optional[str] = None,
-        status: str = "publish"
+        status: str = "publish",
+        featured_media: Optional[int] = None
     ) -> int:
         """
         Publish a post to WordPress
@@ -23,8 +238,9 @@ class WordPressService:
             title: The post title
             content: The post content
             user: The user whose WordPress settings to use
-            image_url: Optional featured image URL
+            image_url: Optional featured image URL, uploaded if featured_media is not given
             status: Post status (draft, publish, etc.)
+            featured_media: Optional ID of an already uploaded featured image
             
         Returns:
             The WordPress post ID
@@ -49,59 +265,35 @@ class WordPressService:
             
             # Configure timeout
             timeout = httpx.Timeout(30.0, connect=10.0)
+            client = wordpress_clients.get_client(wp_url)
             
             # If we have an image URL, upload it first and set it as featured image
-            if image_url:
-                try:
-                    # Download the image
-                    async with httpx.AsyncClient(timeout=timeout) as client:
-                        logger.info(f"Downloading image from: {image_url}")
-                        image_response = await client.get(image_url)
-                        if image_response.status_code != 200:
-                            raise Exception(f"Failed to download image: {image_response.status_code}")
-                        
-                        # Upload the image to WordPress
-                        media_url = urljoin(wp_url, '/wp-json/wp/v2/media')
-                        files = {'file': ('image.jpg', image_response.content, 'image/jpeg')}
-                        logger.info(f"Uploading image to WordPress: {media_url}")
-                        media_response = await client.post(
-                            media_url,
-                            files=files,
-                            auth=auth,
-                            timeout=timeout
-                        )
-                        
-                        if media_response.status_code == 201:
-                            post_data["featured_media"] = media_response.json()["id"]
-                            logger.info("Successfully uploaded featured image")
-                        else:
-                            logger.warning(f"Failed to upload featured image: {media_response.status_code} - {media_response.text}")
-                except TimeoutException:
-                    logger.error("Timeout while handling image upload")
-                    raise Exception("Timeout while uploading image to WordPress")
-                except HTTPError as e:
-                    logger.error(f"HTTP error while handling image: {str(e)}")
-                    raise Exception(f"Failed to handle image: {str(e)}")
+            if featured_media is None and image_url:
+                featured_media = await WordPressService.upload_media(image_url, user)
+            if featured_media is not None:
+                post_data["featured_media"] = featured_media
             
-            # Create the post
+            # Create the post. A 5xx or lost response is not retried here, since
+            # WordPress may have stored the post; the caller recovers it with find_post
             try:
-                async with httpx.AsyncClient(timeout=timeout) as client:
-                    logger.info(f"Publishing post to WordPress: {api_url}")
-                    response = await client.post(
-                        api_url,
-                        json=post_data,
-                        auth=auth,
-                        timeout=timeout
-                    )
-                    
-                    if response.status_code == 201:
-                        post_id = response.json()["id"]
-                        logger.info(f"Successfully published post to WordPress with ID: {post_id}")
-                        return post_id
-                    else:
-                        error_msg = f"Failed to publish post: {response.status_code} - {response.text}"
-                        logger.error(error_msg)
-                        raise Exception(error_msg)
+                logger.info(f"Publishing post to WordPress: {api_url}")
+                response = await send_with_retry(
+                    client,
+                    "POST",
+                    api_url,
+                    json=post_data,
+                    auth=auth,
+                    timeout=timeout
+                )
+                
+                if response.status_code == 201:
+                    post_id = response.json()["id"]
+                    logger.info(f"Successfully published post to WordPress with ID: {post_id}")
+                    return post_id
+                else:
+                    error_msg = f"Failed to publish post: {response.status_code} - {response.text}"
+                    logger.error(error_msg)
+                    raise Exception(error_msg)
             except TimeoutException:
                 logger.error("Timeout while publishing post")
                 raise Exception("Timeout while publishing post to WordPress")
@@ -111,4 +303,182 @@ class WordPressService:
                     
         except Exception as e:
             logger.error(f"Error publishing to WordPress: {str(e)}")
-            raise Exception(f"Failed to publish to WordPress: {str(e)}") 
\ No newline at end of file
+            raise Exception(f"Failed to publish to WordPress: {str(e)}")
+
+    @staticmethod
+    async def upload_media(image_url: str, user: User) -> Optional[int]:
+        """
+        Stream an image from image_url into the WordPress media library
+        
+        Images served by our image store are read straight from disk. Other
+        URLs are downloaded and piped chunk by chunk into the upload request.
+        Either way the image is never held in memory as a whole.
+        
+        Args:
+            image_url: URL of the image to upload
+            user: The user whose WordPress settings to use
+            
+        Returns:
+            The WordPress media ID, or None if WordPress rejected the upload
+        """
+        if not user.wordpress_url or not user.wordpress_username or not user.wordpress_password:
+            raise Exception("WordPress settings not configured for user")
+        
+        wp_url = user.wordpress_url.rstrip('/')
+        media_url = urljoin(wp_url, '/wp-json/wp/v2/media')
+        auth = (user.wordpress_username, user.wordpress_password)
+        timeout = httpx.Timeout(30.0, connect=10.0)
+        client = wordpress_clients.get_client(wp_url)
+        stored_image = await asyncio.to_thread(get_image_store().resolve_url, image_url)
+        
+        async def send_stored() -> httpx.Response:
+            logger.info(f"Uploading stored image {stored_image.name} to WordPress: {media_url}")
+            image_file = await asyncio.to_thread(open, stored_image.path, "rb")
+            with image_file:
+                async def body() -> AsyncIterator[bytes]:
+                    while chunk := await asyncio.to_thread(image_file.read, 256 * 1024):
+                        yield chunk
+                
+                extension = stored_image.name.rsplit(".", 1)[1]
+                headers = {
+                    "Content-Type": stored_image.content_type,
+                    "Content-Disposition": f'attachment; filename="image.{extension}"',
+                    "Content-Length": str(os.fstat(image_file.fileno()).st_size)
+                }
+                return await client.post(media_url, content=body(), headers=headers, auth=auth, timeout=timeout)
+        
+        async def send() -> httpx.Response:
+            image_client = wordpress_clients.get_download_client()
+            logger.info(f"Streaming image from {image_url} to WordPress: {media_url}")
+            async with image_client.stream("GET", image_url, timeout=timeout) as image_response:
+                if image_response.status_code != 200:
+                    raise Exception(f"Failed to download image: {image_response.status_code}")
+                
+                chunks = image_response.aiter_bytes()
+                head = b""
+                async for chunk in chunks:
+                    head = chunk
+                    break
+                content_type, extension = detect_image_type(image_response.headers.get("Content-Type"), head)
+                
+                async def body() -> AsyncIterator[bytes]:
+                    if head:
+                        yield head
+                    async for chunk in chunks:
+                        yield chunk
+                
+                headers = {
+                    "Content-Type": content_type,
+                    "Content-Disposition": f'attachment; filename="image.{extension}"'
+                }
+                # Send a fixed length when we know it; some hosts reject chunked uploads
+                if "Content-Length" in image_response.headers and "Content-Encoding" not in image_response.headers:
+                    headers["Content-Length"] = image_response.headers["Content-Length"]
+                
+                return await client.post(media_url, content=body(), headers=headers, auth=auth, timeout=timeout)
+        
+        try:
+            # Images from our own store are read from disk rather than downloaded
+            media_response = await with_retry(
+                send_stored if stored_image else send,
+                f"POST {media_url}",
+                idempotent=False
+            )
+        except TimeoutException:
+            logger.error("Timeout while handling image upload")
+            raise Exception("Timeout while uploading image to WordPress")
+        except HTTPError as e:
+            logger.error(f"HTTP error while handling image: {str(e)}")
+            raise Exception(f"Failed to handle image: {str(e)}")
+        
+        if media_response.status_code == 201:
+            media_id = media_response.json()["id"]
+            logger.info(f"Successfully uploaded featured image with media ID: {media_id}")
+            return media_id
+        logger.warning(f"Failed to upload featured image: {media_response.status_code} - {media_response.text}")
+        return None
+
+    @staticmethod
+    async def update_post(wordpress_post_id: int, fields: Dict[str, Any], user: User) -> bool:
+        """
+        Update only the given fields of an existing WordPress post
+        
+        Args:
+            wordpress_post_id: The WordPress post ID
+            fields: The post fields to change (title, content, status, featured_media)
+            user: The user whose WordPress settings to use
+            
+        Returns:
+            True if the post was updated, False if it no longer exists in WordPress
+        """
+        if not user.wordpress_url or not user.wordpress_username or not user.wordpress_password:
+            raise Exception("WordPress settings not configured for user")
+        
+        wp_url = user.wordpress_url.rstrip('/')
+        api_url = urljoin(wp_url, f'/wp-json/wp/v2/posts/{wordpress_post_id}')
+        auth = (user.wordpress_username, user.wordpress_password)
+        timeout = httpx.Timeout(30.0, connect=10.0)
+        
+        try:
+            logger.info(f"Updating WordPress post {wordpress_post_id} fields {sorted(fields)}: {api_url}")
+            response = await send_with_retry(
+                wordpress_clients.get_client(wp_url),
+                "PATCH",
+                api_url,
+                json=fields,
+                auth=auth,
+                timeout=timeout
+            )
+        except TimeoutException:
+            logger.error("Timeout while updating post")
+            raise Exception("Timeout while updating post in WordPress")
+        except HTTPError as e:
+            logger.error(f"HTTP error while updating post: {str(e)}")
+            raise Exception(f"Failed to update post: {str(e)}")
+        
+        if response.status_code == 200:
+            return True
+        if response.status_code in (404, 410):
+            return False
+        error_msg = f"Failed to update post: {response.status_code} - {response.text}"
+        logger.error(error_msg)
+        raise Exception(error_msg)
+
+    @staticmethod
+    async def find_post(title: str, created_after: datetime, user: User) -> Optional[int]:
+        """
+        Find a post with exactly this title created after the given time
+        
+        Used to recover when a create request reached WordPress but its
+        response was lost, so retrying does not create a duplicate.
+        
+        Returns:
+            The WordPress post ID, or None if there is no such post
+        """
+        wp_url = user.wordpress_url.rstrip('/')
+        api_url = urljoin(wp_url, '/wp-json/wp/v2/posts')
+        params = {
+            "search": title,
+            "after": created_after.replace(microsecond=0).isoformat() + "+00:00",
+            "status": "publish,future,draft,pending,private",
+            "context": "edit",
+            "orderby": "date",
+            "order": "desc",
+            "per_page": 20
+        }
+        response = await send_with_retry(
+            wordpress_clients.get_client(wp_url),
+            "GET",
+            api_url,
+            params=params,
+            auth=(user.wordpress_username, user.wordpress_password),
+            timeout=httpx.Timeout(30.0, connect=10.0)
+        )
+        if response.status_code != 200:
+            logger.warning(f"Could not search WordPress posts: {response.status_code} - {response.text}")
+            return None
+        for item in response.json():
+            item_title = item.get("title", {})
+            if item_title.get("raw", item_title.get("rendered")) == title:
+                return item["id"]
+        return None
@@ -0,0 +1,123 @@
+import base64
+import hashlib
+import html
+import json
+import re
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+_HEADING_RE = re.compile(r"<h[1-3][^>]*>(.*?)</h[1-3]>", re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r"<[^>]+>")
+
+def strip_tags(value: str) -> str:
+    """Remove HTML tags and unescape entities"""
+    return html.unescape(_TAG_RE.sub("", value)).strip()
+
+def extract_first_heading(content: str) -> Optional[str]:
+    """Return the text of the first h1-h3 heading in an HTML document, if any"""
+    match = _HEADING_RE.search(content or "")
+    if not match:
+        return None
+    return strip_tags(match.group(1)) or None
+
+_PARAGRAPH_BREAK_RE = re.compile(r"\n\s*\n")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?;])\s+")
+# Lines that usually open a new section of a judgment, e.g. "JUDGMENT",
+# "2. Facts of the case", "IV. Analysis"
+_SECTION_HEADING_RE = re.compile(r"^(?:[A-Z][A-Z .,'&-]{3,60}|(?:\d+|[IVXLC]+)[.)]\s+\S.{0,80})$")
+
+def _split_long_paragraph(paragraph: str, max_chars: int) -> List[str]:
+    """Split an oversized paragraph on sentence boundaries, hard-cutting only as a last resort"""
+    pieces: List[str] = []
+    current = ""
+    for sentence in _SENTENCE_END_RE.split(paragraph):
+        while len(sentence) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+def split_text(text: str, max_chars: int, overlap_chars: int = 0) -> List[str]:
+    """
+    Split text into chunks of at most max_chars on paragraph boundaries.
+
+    A chunk that is at least half full is closed early when a section
+    heading starts, so sections stay together where possible. Each chunk
+    after the first begins with up to overlap_chars of trailing paragraphs
+    from the previous chunk for context.
+    """
+    paragraphs: List[str] = []
+    for paragraph in _PARAGRAPH_BREAK_RE.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) > max_chars:
+            paragraphs.extend(_split_long_paragraph(paragraph, max_chars))
+        else:
+            paragraphs.append(paragraph)
+
+    chunks: List[List[str]] = []
+    current: List[str] = []
+    size = 0
+    for paragraph in paragraphs:
+        is_heading = bool(_SECTION_HEADING_RE.match(paragraph))
+        full = size + len(paragraph) > max_chars
+        if current and (full or (is_heading and size >= max_chars // 2)):
+            chunks.append(current)
+            # Carry trailing paragraphs over as overlap, within budget
+            overlap: List[str] = []
+            overlap_size = 0
+            for previous in reversed(current):
+                if overlap_size + len(previous) > overlap_chars or overlap_size + len(previous) + len(paragraph) > max_chars:
+                    break
+                overlap.insert(0, previous)
+                overlap_size += len(previous) + 2
+            current = overlap
+            size = overlap_size
+        current.append(paragraph)
+        size += len(paragraph) + 2
+    if current:
+        chunks.append(current)
+    return ["\n\n".join(chunk) for chunk in chunks]
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Encode a (created_at, id) keyset position as an opaque URL-safe cursor"""
+    raw = json.dumps([created_at.isoformat(), row_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor made by encode_cursor; raises ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+def make_etag(*parts: Any) -> str:
+    """
+    Weak ETag for a representation identified by parts
+
+    Weak because GZipMiddleware may send the same content gzipped or as
+    is, and a strong validator must change with the bytes.
+    """
+    encoded = json.dumps(parts, default=str, separators=(",", ":")).encode("utf-8")
+    return f'W/"{hashlib.sha256(encoded).hexdigest()[:32]}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches etag (weak comparison, per RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque_tag = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque_tag for tag in if_none_match.split(","))
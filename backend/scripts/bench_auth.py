@@ -0,0 +1,82 @@
+"""
+Microbenchmark for resolving the current user from a bearer token.
+
+Calls get_current_user the way a request does (a fresh AsyncSession each
+time) and reports per-call latency for:
+
+    uncached, email lookup  caches disabled, token without a uid claim
+                            (what every request did before the auth caches)
+    uncached, uid lookup    caches disabled, user loaded by primary key
+    cached                  decoded token and user served from the caches
+
+Uses a throwaway SQLite database unless --database-url points at a scratch
+database; against a networked Postgres each skipped query saves a round trip:
+
+    python scripts/bench_auth.py --calls 5000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def timed(samples: list) -> str:
+    samples = sorted(samples)
+    p95 = samples[max(0, int(len(samples) * 0.95) - 1)]
+    return f"mean={statistics.mean(samples) * 1e6:8.1f}us  p50={statistics.median(samples) * 1e6:8.1f}us  p95={p95 * 1e6:8.1f}us"
+
+async def run(calls: int) -> None:
+    from app.core.auth import create_access_token, get_current_user, token_cache, user_cache
+    from app.db.base import AsyncSessionLocal, Base, SessionLocal, async_engine, engine
+    from app.models.user import User
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        user = User(email="bench@example.com", full_name="Bench", hashed_password="x")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+
+    expires = timedelta(hours=1)
+    legacy_token = create_access_token({"sub": "bench@example.com"}, expires)
+    token = create_access_token({"sub": "bench@example.com", "uid": user_id}, expires)
+    max_entries = token_cache.max_entries
+
+    async def measure(name: str, token: str, cached: bool) -> None:
+        token_cache.clear()
+        user_cache.clear()
+        # A cache with no room never stores anything
+        token_cache.max_entries = user_cache.max_entries = max_entries if cached else 0
+        samples = []
+        for _ in range(calls):
+            started = time.perf_counter()
+            async with AsyncSessionLocal() as db:
+                await get_current_user(token, db)
+            samples.append(time.perf_counter() - started)
+        print(f"{name:24} {timed(samples)}")
+
+    await measure("uncached, email lookup", legacy_token, cached=False)
+    await measure("uncached, uid lookup", token, cached=False)
+    await measure("cached", token, cached=True)
+    await async_engine.dispose()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="scratch database (default: a throwaway SQLite file)")
+    parser.add_argument("--calls", type=int, default=5000)
+    args = parser.parse_args()
+
+    os.environ["SQLALCHEMY_DATABASE_URI"] = (
+        args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_auth.db')}"
+    )
+    os.environ.pop("ASYNC_SQLALCHEMY_DATABASE_URI", None)
+    asyncio.run(run(args.calls))
+
+if __name__ == "__main__":
+    main()
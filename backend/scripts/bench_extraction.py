@@ -0,0 +1,104 @@
+"""
+Benchmark for event loop lag while documents are being parsed.
+
+Builds a large synthetic Word document (or uses --file), then extracts its
+text --repeat times, first inline on the event loop (the old upload
+handler) and then through the ExtractionPool, while a ticker measures how
+late the event loop wakes up:
+
+    python scripts/bench_extraction.py --paragraphs 20000 --repeat 3
+    python scripts/bench_extraction.py --file judgment.pdf
+"""
+import argparse
+import asyncio
+import io
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.text_extraction import ExtractionPool, extract_docx_text, extract_pdf_text  # noqa: E402
+
+WORDS = (
+    "the court held that appeal petitioner respondent section act judgment bail order high supreme "
+    "tribunal contract evidence witness article constitution liberty rights was of and to in a is for"
+).split()
+
+def make_docx(paragraphs: int) -> bytes:
+    import docx
+    rng = random.Random(0)
+    document = docx.Document()
+    for _ in range(paragraphs):
+        document.add_paragraph(" ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 60))))
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+async def run(name: str, extract, repeat: int, tick: float) -> None:
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker() -> None:
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(tick)
+            lags.append(time.perf_counter() - started - tick)
+
+    ticking = asyncio.create_task(ticker())
+    # Let the ticker take a first sample before extraction starts
+    await asyncio.sleep(tick)
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await extract()
+        durations.append(time.perf_counter() - started)
+    done.set()
+    await ticking
+
+    lags.sort()
+    p95 = lags[max(0, int(len(lags) * 0.95) - 1)]
+    print(
+        f"{name:16} extract p50={statistics.median(durations) * 1000:8.1f}ms  "
+        f"loop lag p50={statistics.median(lags) * 1000:7.1f}ms  "
+        f"p95={p95 * 1000:7.1f}ms  max={lags[-1] * 1000:7.1f}ms"
+    )
+
+async def main_async(args: argparse.Namespace, source: bytes, extractor) -> None:
+    async def inline() -> None:
+        extractor(source)
+
+    pool = ExtractionPool(max_workers=args.workers, timeout=600, max_memory_mb=0)
+
+    async def pooled() -> None:
+        await pool.run(extractor, source)
+
+    # Start the worker processes before timing
+    await pooled()
+    await run("inline", inline, args.repeat, args.tick)
+    await run("extraction pool", pooled, args.repeat, args.tick)
+    pool.shutdown()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", help="a .docx or .pdf to extract instead of the synthetic document")
+    parser.add_argument("--paragraphs", type=int, default=20_000, help="size of the synthetic Word document")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--tick", type=float, default=0.01, help="event loop probe interval in seconds")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, "rb") as document:
+            source = document.read()
+        extractor = extract_docx_text if args.file.lower().endswith(".docx") else extract_pdf_text
+    else:
+        source = make_docx(args.paragraphs)
+        extractor = extract_docx_text
+    print(f"{len(source) / 2**20:.1f}MB document")
+    asyncio.run(main_async(args, source, extractor))
+
+if __name__ == "__main__":
+    main()
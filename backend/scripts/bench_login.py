@@ -0,0 +1,62 @@
+"""
+Microbenchmark for password verification throughput.
+
+Reports how many logins per second one application worker can verify at
+each bcrypt cost factor, so BCRYPT_ROUNDS and PASSWORD_HASH_WORKERS can be
+tuned against the login latency SLO. Run from the backend directory with
+the usual .env in place:
+
+    python scripts/bench_login.py --rounds 10 11 12 13 --workers 2 --seconds 5
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+from passlib.context import CryptContext
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.auth import PasswordHasher  # noqa: E402
+
+async def bench(rounds: int, workers: int, concurrency: int, seconds: float) -> None:
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+    hashed = context.hash("correct horse battery staple")
+    hasher = PasswordHasher(workers, max_pending=concurrency)
+    latencies = []
+    deadline = time.perf_counter() + seconds
+
+    async def client() -> None:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            await hasher.run(context.verify, "correct horse battery staple", hashed)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[client() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    hasher.shutdown()
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) >= 20 else latencies[-1]
+    print(
+        f"rounds={rounds:<3} workers={workers} concurrency={concurrency:<3} "
+        f"logins/s={len(latencies) / elapsed:8.1f}  "
+        f"p50={statistics.median(latencies) * 1000:7.1f}ms  p95={p95 * 1000:7.1f}ms"
+    )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 11, 12])
+    parser.add_argument("--workers", type=int, default=2, help="hashing threads per application worker")
+    parser.add_argument("--concurrency", type=int, default=16, help="simultaneous login requests")
+    parser.add_argument("--seconds", type=float, default=3.0, help="duration per cost factor")
+    args = parser.parse_args()
+
+    for rounds in args.rounds:
+        asyncio.run(bench(rounds, args.workers, args.concurrency, args.seconds))
+
+if __name__ == "__main__":
+    main()
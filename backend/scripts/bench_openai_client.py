@@ -0,0 +1,124 @@
+"""
+Load test for the OpenAI client under concurrent blog generation.
+
+Starts a fake OpenAI server in a background thread that answers every chat
+completion after --latency seconds, then fires --requests concurrent
+completions through each client setup while a ticker measures how late the
+event loop wakes up (what a /health request would wait for):
+
+    sync client per call    openai.OpenAI created inside the handler and
+                            called synchronously (the old AIService code)
+    shared AsyncOpenAI      get_openai_client(), one pooled client per process
+
+    python scripts/bench_openai_client.py --requests 20 --latency 1
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+COMPLETION = {
+    "id": "chatcmpl-bench",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-4",
+    "choices": [{
+        "index": 0,
+        "message": {"role": "assistant", "content": "<h1>Benchmark</h1>" + "<p>Generated paragraph.</p>" * 200},
+        "finish_reason": "stop",
+    }],
+    "usage": {"prompt_tokens": 1000, "completion_tokens": 1000, "total_tokens": 2000},
+}
+
+def start_fake_openai(latency: float) -> ThreadingHTTPServer:
+    body = json.dumps(COMPLETION).encode("utf-8")
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self) -> None:
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+MESSAGES = [{"role": "user", "content": "Summarise this judgment. " * 200}]
+
+async def sync_client_call(base_url: str) -> None:
+    import openai
+    client = openai.OpenAI(api_key="bench", base_url=base_url)
+    client.chat.completions.create(model="gpt-4", messages=MESSAGES)
+
+async def shared_client_call(base_url: str) -> None:
+    from app.services.openai_client import get_openai_client
+    await get_openai_client().chat.completions.create(model="gpt-4", messages=MESSAGES)
+
+async def run(name: str, call, base_url: str, requests: int, tick: float) -> None:
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker() -> None:
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(tick)
+            lags.append(time.perf_counter() - started - tick)
+
+    ticking = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    await asyncio.gather(*[call(base_url) for _ in range(requests)])
+    elapsed = time.perf_counter() - started
+    done.set()
+    await ticking
+
+    lags.sort()
+    p95 = lags[max(0, int(len(lags) * 0.95) - 1)]
+    print(
+        f"{name:22} wall={elapsed:6.2f}s  completions/s={requests / elapsed:6.1f}  "
+        f"loop lag p50={statistics.median(lags) * 1000:7.1f}ms  "
+        f"p95={p95 * 1000:7.1f}ms  max={lags[-1] * 1000:7.1f}ms"
+    )
+
+async def main_async(args: argparse.Namespace, base_url: str) -> None:
+    from app.services.openai_client import close_openai_client
+    await run("sync client per call", sync_client_call, base_url, args.requests, args.tick)
+    await run("shared AsyncOpenAI", shared_client_call, base_url, args.requests, args.tick)
+    await close_openai_client()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20, help="concurrent completions per client setup")
+    parser.add_argument("--latency", type=float, default=1.0, help="fake OpenAI response time in seconds")
+    parser.add_argument("--tick", type=float, default=0.01, help="event loop probe interval in seconds")
+    args = parser.parse_args()
+
+    server = start_fake_openai(args.latency)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    # Settings are read on import, so point the shared client at the fake server first
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_openai.db')}"
+    os.environ.pop("ASYNC_SQLALCHEMY_DATABASE_URI", None)
+    asyncio.run(main_async(args, base_url))
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
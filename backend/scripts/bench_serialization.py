@@ -0,0 +1,115 @@
+"""
+Microbenchmark for blog post response serialization.
+
+Loads synthetic posts (about 12KB of HTML each) into a throwaway SQLite
+database and reports, per 1,000 posts, the time to fetch them as ORM
+objects versus row tuples and to turn them into JSON bytes through:
+
+    orm + jsonable_encoder  response model validation, jsonable_encoder, stdlib json
+    orm + dump_json         response model validation, pydantic's JSON encoder
+                            (what FastAPI does for a response_model by default)
+    rows + FastJSONResponse plain dicts from row tuples, orjson when installed
+
+    python scripts/bench_serialization.py --posts 1000 --repeat 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def timed(samples: list, posts: int) -> str:
+    per_thousand = sorted(sample * 1000 / posts for sample in samples)
+    p95 = per_thousand[max(0, int(len(per_thousand) * 0.95) - 1)]
+    return f"p50={statistics.median(per_thousand) * 1000:8.2f}ms  p95={p95 * 1000:8.2f}ms  per 1,000 posts"
+
+async def run(database_url: str, posts: int, repeat: int) -> None:
+    os.environ["SQLALCHEMY_DATABASE_URI"] = database_url
+    os.environ.pop("ASYNC_SQLALCHEMY_DATABASE_URI", None)
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+    from sqlalchemy import select
+
+    from app.core.responses import ORJSON_AVAILABLE, FastJSONResponse, rows_to_dicts
+    from app.db.base import AsyncSessionLocal, Base, SessionLocal, async_engine, engine
+    from app.models.blog import BlogPost
+    from app.models.user import User
+    from app.schemas.blog import BlogPostResponse
+    from app.services.blog import POST_COLUMNS
+    from bench_content_storage import make_post
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        user = User(email="bench@example.com", full_name="Bench", hashed_password="x")
+        db.add(user)
+        db.commit()
+        db.execute(BlogPost.__table__.insert(), [
+            {
+                "title": f"Post {i}",
+                "content": make_post(i),
+                "summary": "A short summary of the judgment and what it means for readers.",
+                "keywords": ["bail", "appeal", "supreme court", "liberty", "evidence"],
+                "status": "draft",
+                "user_id": user.id,
+                "created_at": datetime(2024, 1, 1),
+                "updated_at": datetime(2024, 1, 1),
+            }
+            for i in range(posts)
+        ])
+        db.commit()
+
+    adapter = TypeAdapter(List[BlogPostResponse])
+    samples = {name: [] for name in (
+        "fetch orm objects", "fetch row tuples",
+        "orm + jsonable_encoder", "orm + dump_json", "rows + FastJSONResponse",
+    )}
+    for _ in range(repeat):
+        async with AsyncSessionLocal() as db:
+            started = time.perf_counter()
+            objects = list((await db.execute(select(BlogPost))).scalars())
+            samples["fetch orm objects"].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            rows = (await db.execute(select(*POST_COLUMNS))).all()
+            samples["fetch row tuples"].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        body = json.dumps(
+            jsonable_encoder(adapter.validate_python(objects, from_attributes=True)),
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+        samples["orm + jsonable_encoder"].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        adapter.dump_json(adapter.validate_python(objects, from_attributes=True))
+        samples["orm + dump_json"].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        FastJSONResponse(rows_to_dicts(rows)).body
+        samples["rows + FastJSONResponse"].append(time.perf_counter() - started)
+
+    print(f"{posts} posts, {len(body) / 2**20:.1f}MB of JSON, orjson {'installed' if ORJSON_AVAILABLE else 'missing'}")
+    for name, times in samples.items():
+        print(f"{name:26} {timed(times, posts)}")
+    await async_engine.dispose()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_serialization.db')}"
+    asyncio.run(run(database_url, args.posts, args.repeat))
+
+if __name__ == "__main__":
+    main()
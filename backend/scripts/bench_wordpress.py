@@ -0,0 +1,123 @@
+"""
+Benchmark for WordPress publish latency against a local stub server.
+
+Starts a stub WordPress REST API in a background thread that accepts post
+creates (optionally after --latency seconds), then publishes --posts posts
+--concurrency at a time through each client setup:
+
+    new client per call   an httpx.AsyncClient built and closed for every
+                          publish (the old WordPressService code)
+    pooled client         WordPressService.publish_post, reusing the
+                          keep-alive client from wordpress_clients
+
+    python scripts/bench_wordpress.py --posts 200 --concurrency 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urljoin
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def start_stub_wordpress(latency: float) -> ThreadingHTTPServer:
+    lock = threading.Lock()
+    next_id = [0]
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in separate writes; without this, delayed
+        # ACKs add ~40ms to every response on a kept-alive connection
+        disable_nagle_algorithm = True
+
+        def do_POST(self) -> None:
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if latency:
+                time.sleep(latency)
+            with lock:
+                next_id[0] += 1
+                body = json.dumps({"id": next_id[0], "status": "publish"}).encode("utf-8")
+            self.send_response(201)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+POST_CONTENT = "<h1>Benchmark</h1>" + "<p>Generated paragraph about the judgment.</p>" * 200
+
+def timed(samples: list) -> str:
+    samples = sorted(samples)
+    p95 = samples[max(0, int(len(samples) * 0.95) - 1)]
+    return f"p50={statistics.median(samples) * 1000:7.2f}ms  p95={p95 * 1000:7.2f}ms"
+
+async def run(name: str, publish, posts: int, concurrency: int) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(index: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await publish(index)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one(index) for index in range(posts)])
+    elapsed = time.perf_counter() - started
+    print(f"{name:20} posts/s={posts / elapsed:8.1f}  {timed(latencies)}")
+
+async def main_async(args: argparse.Namespace, site_url: str) -> None:
+    import httpx
+
+    import app.db  # noqa: F401  (models import app.db first)
+    from app.models.user import User
+    from app.services.wordpress import WordPressService, wordpress_clients
+
+    user = User(wordpress_url=site_url, wordpress_username="bench", wordpress_password="bench")
+    api_url = urljoin(site_url, "/wp-json/wp/v2/posts")
+
+    async def new_client(index: int) -> None:
+        async with httpx.AsyncClient(timeout=httpx.Timeout(30.0, connect=10.0)) as client:
+            response = await client.post(
+                api_url,
+                json={"title": f"Post {index}", "content": POST_CONTENT, "status": "publish"},
+                auth=("bench", "bench")
+            )
+            response.raise_for_status()
+
+    async def pooled(index: int) -> None:
+        await WordPressService.publish_post(f"Post {index}", POST_CONTENT, user)
+
+    await run("new client per call", new_client, args.posts, args.concurrency)
+    await run("pooled client", pooled, args.posts, args.concurrency)
+    await wordpress_clients.aclose()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4, help="publishes in flight at once")
+    parser.add_argument("--latency", type=float, default=0.0, help="stub server processing time in seconds")
+    args = parser.parse_args()
+
+    server = start_stub_wordpress(args.latency)
+    site_url = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_wordpress.db')}"
+    os.environ.pop("ASYNC_SQLALCHEMY_DATABASE_URI", None)
+    asyncio.run(main_async(args, site_url))
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
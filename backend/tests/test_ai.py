@@ -0,0 +1,82 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.services import ai
+from app.services.ai import AIService
+from app.services.generation_cache import InMemoryGenerationCache
+
+def completion(text: str) -> SimpleNamespace:
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+@pytest.fixture
+def cache(monkeypatch) -> InMemoryGenerationCache:
+    cache = InMemoryGenerationCache(max_entries=10, ttl_seconds=60)
+    monkeypatch.setattr(ai, "get_generation_cache", lambda: cache)
+    monkeypatch.setattr(settings, "AI_STRUCTURED_OUTPUT", False)
+    return cache
+
+@pytest.fixture
+def openai_calls(monkeypatch) -> dict:
+    """Fake chat completions; the keywords call fails while calls["fail_keywords"] is set"""
+    calls = {"fail_keywords": True, "count": 0}
+
+    async def create_chat_completion(**kwargs):
+        calls["count"] += 1
+        prompt = kwargs["messages"][-1]["content"]
+        if prompt.startswith("Extract 5-7 relevant keywords"):
+            if calls["fail_keywords"]:
+                raise TimeoutError("keywords timed out")
+            return completion("bail, appeal")
+        if prompt.startswith("Create a compelling title"):
+            return completion("A v. B: Bail - Granted")
+        if prompt.startswith("Create a brief summary"):
+            return completion("Bail was granted.")
+        return completion("<h1>A v. B</h1><p>Body</p>")
+
+    monkeypatch.setattr(ai, "create_chat_completion", create_chat_completion)
+    return calls
+
+def test_result_with_fallback_is_not_cached(cache, openai_calls):
+    first = asyncio.run(AIService.process_content("judgment text"))
+    assert first["keywords"] == []
+
+    openai_calls["fail_keywords"] = False
+    second = asyncio.run(AIService.process_content("judgment text"))
+    assert second["keywords"] == ["bail", "appeal"]
+
+    calls = openai_calls["count"]
+    third = asyncio.run(AIService.process_content("judgment text"))
+    assert third["keywords"] == ["bail", "appeal"]
+    assert openai_calls["count"] == calls
+
+def test_streamed_result_with_fallback_is_not_cached(cache, openai_calls, monkeypatch):
+    async def stream_events() -> dict:
+        return {event: data async for event, data in AIService.stream_content("judgment text")}
+
+    class Stream:
+        def __init__(self, text: str):
+            self.chunks = iter([SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])])
+
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            try:
+                return next(self.chunks)
+            except StopIteration:
+                raise StopAsyncIteration
+
+    async def create(**kwargs):
+        return Stream("<h1>A v. B</h1><p>Body</p>")
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(ai, "get_openai_client", lambda: client)
+
+    assert asyncio.run(stream_events())["keywords"] == []
+    assert cache.stats()["entries"] == 0
+
+    openai_calls["fail_keywords"] = False
+    assert asyncio.run(stream_events())["keywords"] == ["bail", "appeal"]
+    assert cache.stats()["entries"] == 1
@@ -0,0 +1,114 @@
+import asyncio
+from typing import Callable, List
+
+import httpx
+import pytest
+
+from app.db.base import AsyncSessionLocal, Base, engine
+from app.models.blog import BlogPost
+from app.models.user import User
+from app.services.blog import BlogService
+from app.services.wordpress import HTTPClientRegistry, WordPressService, wordpress_clients
+
+WP_URL = "https://wp.example"
+
+@pytest.fixture
+def wordpress(monkeypatch) -> Callable[[Callable[[httpx.Request], httpx.Response]], List[httpx.Request]]:
+    """Route the WordPress client for WP_URL to a handler and record every request"""
+    def install(handler: Callable[[httpx.Request], httpx.Response]) -> List[httpx.Request]:
+        requests: List[httpx.Request] = []
+
+        async def record(request: httpx.Request) -> httpx.Response:
+            await request.aread()
+            requests.append(request)
+            return handler(request)
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(record))
+        monkeypatch.setitem(wordpress_clients._clients, wordpress_clients.origin(WP_URL), client)
+        return requests
+    return install
+
+def make_user() -> User:
+    return User(
+        id=1,
+        email="author@example.com",
+        hashed_password="x",
+        wordpress_url=WP_URL,
+        wordpress_username="author",
+        wordpress_password="secret"
+    )
+
+def creates(requests: List[httpx.Request]) -> List[httpx.Request]:
+    return [r for r in requests if r.method == "POST" and r.url.path == "/wp-json/wp/v2/posts"]
+
+def test_create_is_not_retried_on_bad_gateway(wordpress):
+    requests = wordpress(lambda request: httpx.Response(502))
+
+    with pytest.raises(Exception, match="502"):
+        asyncio.run(WordPressService.publish_post("Title", "<p>Body</p>", make_user()))
+
+    assert len(creates(requests)) == 1
+
+def test_create_is_retried_when_throttled(wordpress):
+    responses = iter([httpx.Response(429), httpx.Response(201, json={"id": 42})])
+    requests = wordpress(lambda request: next(responses))
+
+    assert asyncio.run(WordPressService.publish_post("Title", "<p>Body</p>", make_user())) == 42
+    assert len(creates(requests)) == 2
+
+def test_media_upload_is_not_retried_on_bad_gateway(wordpress, tmp_path, monkeypatch):
+    requests = wordpress(lambda request: httpx.Response(502))
+    download = httpx.AsyncClient(transport=httpx.MockTransport(
+        lambda request: httpx.Response(200, content=b"\x89PNG\r\n\x1a\n" + b"\0" * 64)
+    ))
+    monkeypatch.setattr(wordpress_clients, "_download_client", download)
+
+    assert asyncio.run(WordPressService.upload_media("https://images.example/a.png", make_user())) is None
+    assert len([r for r in requests if r.url.path == "/wp-json/wp/v2/media"]) == 1
+
+def test_publish_recovers_lost_create_without_duplicating(wordpress):
+    stored = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.method == "POST":
+            # WordPress stores the post, but the gateway times out the response
+            stored["id"] = 42
+            return httpx.Response(502)
+        return httpx.Response(200, json=[{"id": stored["id"], "title": {"raw": "Title"}}])
+    requests = wordpress(handler)
+
+    async def publish_twice() -> int:
+        async with AsyncSessionLocal() as db:
+            user = make_user()
+            db.add(user)
+            post = BlogPost(title="Title", content="<p>Body</p>", keywords=[], status="draft", user_id=1)
+            db.add(post)
+            await db.commit()
+            with pytest.raises(Exception, match="502"):
+                await BlogService._publish_to_wordpress(post, user)
+            await db.refresh(post)
+            return await BlogService._publish_to_wordpress(post, user)
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    assert asyncio.run(publish_twice()) == 42
+    assert len(creates(requests)) == 1
+
+def test_registry_closes_least_recently_used_clients():
+    async def fill() -> None:
+        registry = HTTPClientRegistry(max_origins=2)
+        first = registry.get_client("https://one.example/wp-json")
+        second = registry.get_client("https://two.example")
+        registry.get_client("https://one.example")
+        registry.get_client("https://three.example")
+        for site in ("one", "two", "three"):
+            registry.get_semaphore(f"https://{site}.example")
+        await asyncio.sleep(0)
+
+        assert list(registry._clients) == ["https://one.example", "https://three.example"]
+        assert list(registry._semaphores) == ["https://two.example", "https://three.example"]
+        assert second.is_closed and not first.is_closed
+        await registry.aclose()
+        assert first.is_closed
+
+    asyncio.run(fill())
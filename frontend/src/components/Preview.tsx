@@ -18,7 +18,11 @@ export default function Preview({ title, content, summary, keywords }: PreviewPr
   const handleGenerateImage = async () => {
     setIsGeneratingImage(true);
     try {
-      const imageUrl = await imageService.generateImage({ content, title });
+      const imageUrl = await imageService.generateImage({
+        content,
+        title,
+        regenerate: generatedImage !== null
+      });
       setGeneratedImage(imageUrl);
       toast.success('Image generated successfully!');
     } catch (error) {
@@ -8,10 +8,29 @@ export interface BlogPost {
   keywords: string[];
   image_url?: string;
   status: 'draft' | 'published' | 'private';
+  version: number;
   created_at: string;
   updated_at: string;
 }
 
+export type BlogPostListItem = Omit<BlogPost, 'content'>;
+
+export interface BlogPostPage {
+  items: BlogPostListItem[];
+  next_cursor: string | null;
+}
+
+export interface BlogPostListParams {
+  limit?: number;
+  cursor?: string;
+  status?: BlogPost['status'];
+}
+
+export interface BlogPostStats {
+  total: number;
+  by_status: Record<string, number>;
+}
+
 export interface BlogPostCreate {
   title: string;
   content: string;
@@ -30,9 +49,40 @@ export interface BlogPostUpdate {
   status?: 'draft' | 'published' | 'private';
 }
 
+// Replace content.slice(start, end) of the base version with text. Offsets
+// are UTF-16 code units as used by slice(); patchBlogPost converts them to
+// the Unicode code points the API expects.
+export interface TextEdit {
+  start: number;
+  end: number;
+  text: string;
+}
+
+export interface BlogPostPatch extends Omit<BlogPostUpdate, 'content'> {
+  version: number;
+  content?: string;
+  content_edits?: TextEdit[];
+}
+
+export interface BlogPostPatchResult {
+  id: number;
+  version: number;
+  updated_at: string;
+}
+
+// Code points in text.slice(0, offset), so emoji and other characters
+// outside the BMP count once, as they do in the API
+const toCodePointOffset = (text: string, offset: number): number =>
+  Array.from(text.slice(0, offset)).length;
+
 export const blogService = {
-  async getBlogPosts(): Promise<BlogPost[]> {
-    const response = await api.get('/blog/');
+  async getBlogPosts(params: BlogPostListParams = {}): Promise<BlogPostPage> {
+    const response = await api.get('/blog/', { params });
+    return response.data;
+  },
+
+  async getBlogStats(): Promise<BlogPostStats> {
+    const response = await api.get('/blog/stats');
     return response.data;
   },
 
@@ -51,6 +101,26 @@ export const blogService = {
     return response.data;
   },
 
+  // Send only what changed; rejects with 409 if the post moved past patch.version
+  // baseContent is the content of patch.version, needed to send content_edits
+  async patchBlogPost(id: number, patch: BlogPostPatch, baseContent?: string): Promise<BlogPostPatchResult> {
+    if (patch.content_edits) {
+      if (baseContent === undefined) {
+        throw new Error('baseContent is required to send content_edits');
+      }
+      patch = {
+        ...patch,
+        content_edits: patch.content_edits.map((edit) => ({
+          ...edit,
+          start: toCodePointOffset(baseContent, edit.start),
+          end: toCodePointOffset(baseContent, edit.end),
+        })),
+      };
+    }
+    const response = await api.patch(`/blog/${id}`, patch);
+    return response.data;
+  },
+
   async deleteBlogPost(id: number): Promise<void> {
     await api.delete(`/blog/${id}`);
   },
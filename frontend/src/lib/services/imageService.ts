@@ -7,6 +7,8 @@ export interface ImageGenerationResponse {
 export interface ImageGenerationRequest {
   content: string;
   title: string;
+  // Ask for a new image instead of the one already generated for this post
+  regenerate?: boolean;
 }
 
 export const imageService = {
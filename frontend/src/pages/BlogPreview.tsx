@@ -43,16 +43,17 @@ export default function BlogPreview() {
     try {
       const imageUrl = await imageService.generateImage({
         content: post.content,
-        title: post.title
+        title: post.title,
+        regenerate: Boolean(post.image_url)
       });
       
       // Update the post with the new image URL
-      const updatedPost = await blogService.updateBlogPost(post.id, {
-        ...post,
+      const { version, updated_at } = await blogService.patchBlogPost(post.id, {
+        version: post.version,
         image_url: imageUrl
       });
       
-      setPost(updatedPost);
+      setPost({ ...post, image_url: imageUrl, version, updated_at });
       toast.success('Image generated successfully!');
     } catch (error) {
       toast.error('Failed to generate image');
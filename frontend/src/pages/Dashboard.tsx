@@ -8,22 +8,24 @@ import {
   CalendarIcon,
   ArrowRightIcon,
 } from '@heroicons/react/24/outline';
-import { blogService, BlogPost } from '../lib/services/blogService';
+import { blogService, BlogPostListItem, BlogPostStats } from '../lib/services/blogService';
 import toast from 'react-hot-toast';
 
 export default function Dashboard() {
-  const [posts, setPosts] = useState<BlogPost[]>([]);
+  const [posts, setPosts] = useState<BlogPostListItem[]>([]);
+  const [postStats, setPostStats] = useState<BlogPostStats>({ total: 0, by_status: {} });
   const [isLoading, setIsLoading] = useState(true);
 
   useEffect(() => {
     const fetchPosts = async () => {
       try {
-        const data = await blogService.getBlogPosts();
-        // Sort posts by creation date, most recent first
-        const sortedPosts = data.sort((a, b) => 
-          new Date(b.created_at).getTime() - new Date(a.created_at).getTime()
-        );
-        setPosts(sortedPosts);
+        // Posts come back most recent first
+        const [page, counts] = await Promise.all([
+          blogService.getBlogPosts({ limit: 5 }),
+          blogService.getBlogStats(),
+        ]);
+        setPosts(page.items);
+        setPostStats(counts);
       } catch (error) {
         console.error('Error fetching posts:', error);
         toast.error('Failed to load posts');
@@ -36,10 +38,10 @@ export default function Dashboard() {
   }, []);
 
   const stats = [
-    { name: 'Total Posts', value: posts.length.toString(), icon: DocumentTextIcon },
-    { name: 'Draft Posts', value: posts.filter(post => post.status === 'draft').length.toString(), icon: ClockIcon },
-    { name: 'Published Posts', value: posts.filter(post => post.status === 'published').length.toString(), icon: ChartBarIcon },
-    { name: 'AI Generated', value: posts.length.toString(), icon: SparklesIcon },
+    { name: 'Total Posts', value: postStats.total.toString(), icon: DocumentTextIcon },
+    { name: 'Draft Posts', value: (postStats.by_status.draft ?? 0).toString(), icon: ClockIcon },
+    { name: 'Published Posts', value: (postStats.by_status.published ?? 0).toString(), icon: ChartBarIcon },
+    { name: 'AI Generated', value: postStats.total.toString(), icon: SparklesIcon },
   ];
 
   if (isLoading) {